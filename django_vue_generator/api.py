@@ -0,0 +1,118 @@
+import json
+import re
+
+from django_vue_generator.manifest import stable, write_generated
+from django_vue_generator.resolver import get_index, index_cache
+from django_vue_generator.vue import JsModule
+
+API_PATH = "frontend/src/api.js"
+
+# can't be exported as resource names
+RESERVED = {
+    "resource",
+    *"""break case catch class const continue debugger default delete do else
+    enum export extends false finally for function if import in instanceof new
+    null return super switch this throw true try typeof var void while with
+    yield let static await implements package protected interface private
+    public""".split(),
+}
+
+API_JS = """// Generated by django_vue_generator, changes will be overwritten.
+import Vue from 'vue';
+import {request, invalidate} from './vuegen-runtime';
+
+// Requests of one viewset. GETs go through the runtime cache, so concurrent
+// identical requests are coalesced into one and only the latest request of a
+// component (owner) in a channel resolves. Saving drops cached responses.
+export function resource(listUrl, detailUrl) {
+  const detail = pk => `${detailUrl}/${pk}/`;
+  const changed = data => {
+    if (listUrl) invalidate(listUrl);
+    if (detailUrl) invalidate(detailUrl);
+    return data;
+  };
+  return {
+    list: (owner, params, channel = 'list') => request(owner, channel, Vue.http, listUrl, params),
+    // next/previous links of paginated lists
+    follow: (owner, url, channel = 'list') => request(owner, channel, Vue.http, url),
+    retrieve: (owner, pk, channel = 'retrieve') => request(owner, channel, Vue.http, detail(pk)),
+    create: data => Vue.http.post(listUrl, data).then(r => r.json()).then(changed),
+    update: (pk, data) => Vue.http.put(detail(pk), data).then(r => r.json()).then(changed),
+    destroy: pk => Vue.http.delete(detail(pk)).then(changed),
+  };
+}
+"""
+
+
+def resource_names():
+    """
+    Maps routed viewsets to unique js names derived from router basenames.
+    Computed once per url index.
+    """
+    cache = index_cache()
+    if "resource_names" not in cache:
+        cache["resource_names"] = build_resource_names(get_index())
+    return cache["resource_names"]
+
+
+def build_resource_names(index):
+    names = {}
+    taken = set()
+    for viewset in sorted(index, key=lambda v: f"{v.__module__}.{v.__qualname__}"):
+        urls = index[viewset]
+        if not (urls.list_url or urls.retrieve_url):
+            continue
+        base = re.sub(r"\W|^(?=\d)", "_", urls.basename or viewset.__name__)
+        if base in RESERVED:
+            base += "_"
+        name, i = base, 1
+        while name in taken:
+            i += 1
+            name = f"{base}_{i}"
+        taken.add(name)
+        names[viewset] = name
+    return names
+
+
+def api_import(viewset, list_url, retrieve_url):
+    """Imports the api resource of viewset as "api" into a generated component."""
+    name = resource_names().get(viewset)
+    if name:
+        return f"import {{{name} as api}} from '../api';\n"
+    # not routed, e.g. a subclass of a routed viewset
+    return (
+        f"import {{resource}} from '../api';\n"
+        f"const api = resource({json.dumps(list_url)}, {json.dumps(retrieve_url)});\n"
+    )
+
+
+class ApiGenerator(JsModule):
+    """
+    frontend/src/api.js with a resource for every routed viewset, which
+    generated components import instead of having their own requests.
+    """
+
+    filename = API_PATH
+    packages = ["vue-resource"]
+
+    def __init__(self):
+        index = get_index()
+        self.resources = [
+            (name, index[viewset].list_url, index[viewset].retrieve_url)
+            for viewset, name in resource_names().items()
+        ]
+
+    def inputs(self):
+        return {"generator": stable(type(self)), "resources": self.resources}
+
+    def source(self):
+        yield API_JS
+        for name, list_url, retrieve_url in self.resources:
+            yield (
+                f"export const {name} = resource"
+                f"({json.dumps(list_url)}, {json.dumps(retrieve_url)});\n"
+            )
+
+
+def write_api(manifest, force=False):
+    return write_generated(ApiGenerator(), manifest, force)
@@ -0,0 +1,464 @@
+import atexit
+import json
+import os
+import re
+import shutil
+import threading
+from subprocess import Popen, PIPE, DEVNULL
+
+from django_vue_generator.profiling import phase
+
+# Seconds to wait for the worker to start or to answer, it is killed after
+TIMEOUT = 10
+
+# Long-lived node process speaking line-delimited json over stdin/stdout.
+# Request: {"id": 1, "type": "vue"|"js", "src": "..."}
+# Response: {"id": 1, "result": "..."} or {"id": 1, "error": "..."}
+WORKER_JS = r"""
+const readline = require('readline');
+let beautify;
+try {
+    beautify = require('js-beautify');
+} catch (e) {
+    process.stdout.write(JSON.stringify({id: 0, error: String(e)}) + '\n');
+    process.exit(1);
+}
+const options = {indent_size: 2, indent_scripts: 'normal', end_with_newline: true};
+process.stdout.write(JSON.stringify({id: 0, result: 'ready'}) + '\n');
+readline.createInterface({input: process.stdin}).on('line', line => {
+    let request = {};
+    try {
+        request = JSON.parse(line);
+        const format = request.type === 'js' ? beautify.js : beautify.html;
+        process.stdout.write(JSON.stringify({id: request.id, result: format(request.src, options)}) + '\n');
+    } catch (e) {
+        process.stdout.write(JSON.stringify({id: request.id, error: String(e)}) + '\n');
+    }
+});
+"""
+
+
+def node_path():
+    """
+    Directories containing js-beautify, found next to the vue-beautify/js-beautify
+    binaries installed by start_frontend (yarn global add vue-beautify js-beautify).
+    """
+    paths = []
+    for binary in ["js-beautify", "vue-beautify"]:
+        location = shutil.which(binary)
+        if not location:
+            continue
+        head = os.path.realpath(location)
+        while head != os.path.dirname(head):
+            head, tail = os.path.split(head)
+            if tail == "node_modules":
+                paths.append(os.path.join(head, tail))
+                paths.append(os.path.join(head, tail, binary, "node_modules"))
+                break
+    paths.extend(filter(None, os.environ.get("NODE_PATH", "").split(os.pathsep)))
+    return os.pathsep.join(dict.fromkeys(paths))
+
+
+class BeautifyError(Exception):
+    pass
+
+
+class BeautifyWorker:
+    """
+    Formats sources with a single node process which is started on first use
+    and reused by every generator. Falls back to python_beautify when node or
+    js-beautify is not available or the worker gets stuck.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.available = None
+        self.lock = threading.Lock()
+        self.counter = 0
+        atexit.register(self.close)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self.forget)
+
+    def start(self):
+        node = shutil.which("node")
+        if not node:
+            return False
+        env = dict(os.environ, NODE_PATH=node_path())
+        try:
+            self.process = Popen(
+                [node, "-e", WORKER_JS],
+                stdin=PIPE,
+                stdout=PIPE,
+                stderr=DEVNULL,
+                env=env,
+                universal_newlines=True,
+                encoding="utf-8",
+            )
+        except OSError:
+            return False
+        try:
+            ready = "result" in json.loads(self.readline())
+        except (OSError, ValueError):
+            ready = False
+        if not ready:
+            self.close()
+        return ready
+
+    def readline(self):
+        process = self.process
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(TIMEOUT, kill)
+        timer.start()
+        try:
+            line = process.stdout.readline()
+        finally:
+            timer.cancel()
+        if timed_out.is_set():
+            raise TimeoutError(f"beautify worker did not answer in {TIMEOUT}s")
+        if not line:
+            raise OSError("beautify worker exited")
+        return line
+
+    def request(self, src, type):
+        self.counter += 1
+        self.process.stdin.write(
+            json.dumps({"id": self.counter, "type": type, "src": src}) + "\n"
+        )
+        self.process.stdin.flush()
+        response = json.loads(self.readline())
+        if "error" in response:
+            raise BeautifyError(response["error"])
+        return response["result"]
+
+    def __call__(self, src, type="vue"):
+        with self.lock:
+            if self.available is None:
+                self.available = self.start()
+            if self.available:
+                try:
+                    return self.request(src, type)
+                except BeautifyError:
+                    pass
+                except TimeoutError:
+                    # don't wait for a stuck worker on every render
+                    self.close()
+                    self.available = False
+                except (OSError, ValueError):
+                    # broken pipe or garbage on stdout: restart on next call
+                    self.close()
+                    self.available = None
+        return python_beautify(src, type)
+
+    def forget(self):
+        """Drops the parent's process in a forked child, it starts its own."""
+        self.process = None
+        self.available = None
+        self.lock = threading.Lock()
+
+    def close(self):
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except Exception:
+            process.kill()
+
+
+worker = BeautifyWorker()
+
+
+def beautify(src, type="vue"):
+    with phase("beautify"):
+        return worker(src, type)
+
+
+# Pure python fallback. It only re-indents and splits lines, it never changes
+# the contents of strings, template literals, regular expressions or comments.
+
+VOID_TAGS = {"input", "br", "hr", "img", "meta", "link", "source", "col"}
+BLOCK = re.compile(
+    r"^<(template|script|style)\b([^>]*)>\n?(.*?)\n?</\1>\n?(?=^<(?:template|script|style)\b|\Z)",
+    re.M | re.S,
+)
+TAG = re.compile(r"""<(/?)([\w-]+)(?:[^"'>]|"[^"]*"|'[^']*')*?(/?)>|<!--.*?-->""", re.S)
+WORD = re.compile(r"[\w$]+")
+SPACE = re.compile(r"[^\S\n]+")
+# keywords after which a / starts a regular expression, not a division
+REGEX_AFTER = set(
+    """return typeof instanceof in of new delete void throw case do else
+    yield await""".split()
+)
+
+
+def python_beautify(src, type="vue", indent="  "):
+    if type == "js":
+        return format_js(src, indent)
+    blocks = []
+    for tag, attrs, body in BLOCK.findall(src):
+        formatter = {"template": format_html, "script": format_js, "style": format_css}
+        body = formatter[tag](body, indent).strip("\n")
+        if tag == "template":
+            body = "\n".join(
+                f"{indent}{line}" if line else line for line in body.split("\n")
+            )
+        blocks.append(f"<{tag}{attrs.rstrip()}>\n{body}\n</{tag}>\n")
+    return "\n".join(blocks) if blocks else src
+
+
+def format_html(src, indent="  "):
+    tokens = []
+    pos = 0
+    for m in TAG.finditer(src):
+        text = src[pos : m.start()].strip()
+        if text:
+            tokens.append(("text", text, None))
+        if m.group(0).startswith("<!--"):
+            tokens.append(("text", m.group(0), None))
+        elif m.group(1):
+            tokens.append(("close", m.group(0), m.group(2)))
+        elif m.group(3) or m.group(2).lower() in VOID_TAGS:
+            tokens.append(("void", m.group(0), m.group(2)))
+        else:
+            tokens.append(("open", m.group(0), m.group(2)))
+        pos = m.end()
+    if src[pos:].strip():
+        tokens.append(("text", src[pos:].strip(), None))
+
+    lines = []
+    depth = 0
+    i = 0
+    while i < len(tokens):
+        kind, value, name = tokens[i]
+        rest = tokens[i + 1 : i + 3]
+        if kind == "open" and rest and rest[0][0] == "close" and rest[0][2] == name:
+            lines.append(indent * depth + value + rest[0][1])
+            i += 2
+            continue
+        if (
+            kind == "open"
+            and len(rest) == 2
+            and rest[0][0] == "text"
+            and rest[1][0] == "close"
+            and rest[1][2] == name
+            and "\n" not in rest[0][1]
+        ):
+            lines.append(indent * depth + value + rest[0][1] + rest[1][1])
+            i += 3
+            continue
+        if kind == "close":
+            depth = max(depth - 1, 0)
+        for line in value.split("\n"):
+            lines.append(indent * depth + line.strip())
+        if kind == "open":
+            depth += 1
+        i += 1
+    return "\n".join(lines) + "\n"
+
+
+def js_tokens(src, i=0):
+    """
+    Yields (kind, start, end) of the js tokens in src from i on. Kinds are
+    "literal" for strings, template literals and regular expressions,
+    "comment", "newline", "space", "word" and "punct" for other characters.
+    """
+    prev = None
+    while i < len(src):
+        c = src[i]
+        kind, end = "punct", i + 1
+        if c in "'\"":
+            kind, end = "literal", _string_end(src, i)
+        elif c == "`":
+            kind, end = "literal", _template_end(src, i)
+        elif src.startswith("//", i):
+            end = src.find("\n", i)
+            kind, end = "comment", len(src) if end == -1 else end
+        elif src.startswith("/*", i):
+            end = src.find("*/", i + 2)
+            kind, end = "comment", len(src) if end == -1 else end + 2
+        elif c == "/" and _regex_allowed(prev):
+            end = _regex_end(src, i)
+            # not terminated on its line, so it is a division after all
+            kind, end = ("literal", end) if end else ("punct", i + 1)
+        elif c == "\n":
+            kind = "newline"
+        elif c.isspace():
+            kind, end = "space", SPACE.match(src, i).end()
+        elif WORD.match(src, i):
+            kind, end = "word", WORD.match(src, i).end()
+        end = min(end, len(src))
+        yield kind, i, end
+        if kind not in ("comment", "newline", "space"):
+            prev = kind, src[i:end]
+        i = end
+
+
+def _regex_allowed(prev):
+    """Whether a / after the token prev starts a regular expression."""
+    if prev is None:
+        return True
+    kind, text = prev
+    if kind == "word":
+        return text in REGEX_AFTER
+    return kind == "punct" and text not in ")]}"
+
+
+def _string_end(src, i):
+    quote = src[i]
+    i += 1
+    while i < len(src):
+        c = src[i]
+        if c == "\\":
+            i += 2
+        elif c == quote:
+            return i + 1
+        elif c == "\n":
+            return i
+        else:
+            i += 1
+    return i
+
+
+def _template_end(src, i):
+    i += 1
+    while i < len(src):
+        if src[i] == "\\":
+            i += 2
+        elif src[i] == "`":
+            return i + 1
+        elif src.startswith("${", i):
+            i = _expression_end(src, i + 2)
+        else:
+            i += 1
+    return i
+
+
+def _expression_end(src, i):
+    """Index after the } closing the template literal expression at src[i]."""
+    depth = 0
+    for kind, start, end in js_tokens(src, i):
+        if kind != "punct":
+            continue
+        if src[start] == "{":
+            depth += 1
+        elif src[start] == "}":
+            if not depth:
+                return end
+            depth -= 1
+    return len(src)
+
+
+def _regex_end(src, i):
+    """Index after the regular expression at src[i] and its flags, or None."""
+    in_class = False
+    i += 1
+    while i < len(src):
+        c = src[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "\n":
+            return None
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            flags = WORD.match(src, i + 1)
+            return flags.end() if flags else i + 1
+        i += 1
+    return None
+
+
+def format_js(src, indent="  "):
+    out = []
+    line = []
+    stack = []
+
+    def newline():
+        text = "".join(line).strip()
+        if text:
+            out.append(indent * stack.count("{") + text)
+        line.clear()
+
+    empty_braces = False
+    for kind, start, end in js_tokens(src):
+        c = src[start:end]
+        if empty_braces:
+            empty_braces = False
+            continue
+        if kind == "newline":
+            newline()
+        elif kind != "punct":
+            line.append(c)
+            if c.startswith("//"):
+                newline()
+        elif c in "([":
+            stack.append(c)
+            line.append(c)
+        elif c in ")]":
+            if stack and stack[-1] != "{":
+                stack.pop()
+            line.append(c)
+        elif src.startswith("{}", start):
+            line.append("{}")
+            empty_braces = True
+        elif c == "{":
+            line.append(c)
+            newline()
+            stack.append(c)
+        elif c == "}":
+            newline()
+            if stack and stack[-1] == "{":
+                stack.pop()
+            line.append(c)
+            rest = src[end:].lstrip(" ")
+            if not rest.startswith(
+                (
+                    ",",
+                    ";",
+                    ")",
+                    "]",
+                    ":",
+                    ".",
+                    "else",
+                    "catch",
+                    "finally",
+                    "while",
+                    "from",
+                )
+            ):
+                newline()
+        elif c in ";," and (not stack or stack[-1] == "{"):
+            line.append(c)
+            newline()
+        else:
+            line.append(c)
+    newline()
+    return "\n".join(out) + "\n"
+
+
+def format_css(src, indent="  "):
+    out = []
+    depth = 0
+    for token in re.split(r"([{};])", src):
+        token = token.strip()
+        if not token:
+            continue
+        if token == "{":
+            out[-1] = f"{out[-1]} {{" if out else "{"
+            depth += 1
+        elif token == "}":
+            depth = max(depth - 1, 0)
+            out.append(indent * depth + "}")
+        elif token == ";":
+            out[-1] += ";"
+        else:
+            out.append(indent * depth + token)
+    return "\n".join(out) + "\n"
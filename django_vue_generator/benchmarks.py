@@ -0,0 +1,169 @@
+import gc
+import itertools
+import platform
+import statistics
+import time
+import tracemalloc
+from functools import lru_cache
+
+import django
+import rest_framework
+from django.db import models
+from rest_framework import pagination, serializers, viewsets
+
+from django_vue_generator import __version__
+from django_vue_generator.forms import VueForm
+from django_vue_generator.lists import ListGenerator
+from django_vue_generator.vue import py_to_js
+
+FIELD_FACTORIES = [
+    lambda i, choices: serializers.CharField(max_length=100, min_length=2),
+    lambda i, choices: serializers.IntegerField(
+        min_value=0, max_value=1000, required=False
+    ),
+    lambda i, choices: serializers.EmailField(),
+    lambda i, choices: serializers.URLField(required=False),
+    lambda i, choices: serializers.BooleanField(),
+    lambda i, choices: serializers.DateField(),
+    lambda i, choices: serializers.DecimalField(max_digits=10, decimal_places=2),
+    lambda i, choices: serializers.ChoiceField(
+        choices=[(f"{i}_{c}", f"Choice {c}") for c in range(choices)]
+    ),
+]
+
+# one axis at a time instead of every combination, 100k choices on 500 fields
+# would mostly measure the ChoiceFields
+MATRIX = [
+    *({"width": w, "depth": 0, "choices": 10} for w in (10, 50, 100, 200, 500)),
+    *({"width": 50, "depth": d, "choices": 10} for d in (1, 2, 3)),
+    *({"width": 50, "depth": 0, "choices": c} for c in (1000, 10000, 100000)),
+]
+
+
+@lru_cache(maxsize=None)
+def synthetic_model():
+    """Unmigrated model, generators only need its _meta."""
+    return type(
+        "BenchmarkModel",
+        (models.Model,),
+        {
+            "__module__": __name__,
+            "Meta": type("Meta", (), {"app_label": "django_vue_generator"}),
+        },
+    )
+
+
+def synthetic_serializer(width=200, depth=0, choices=10):
+    """
+    New serializer class with width fields, every eighth a ChoiceField with
+    choices options, and a nested serializer of the same shape depth levels
+    deep. A new class each time, so field descriptions aren't cached yet.
+    """
+    attrs = {
+        f"field_{i}": FIELD_FACTORIES[i % len(FIELD_FACTORIES)](i, choices)
+        for i in range(width)
+    }
+    if depth:
+        attrs["nested"] = synthetic_serializer(width, depth - 1, choices)(
+            required=False
+        )
+    attrs["Meta"] = type("Meta", (), {"model": synthetic_model()})
+    return type(f"Benchmark{width}Serializer", (serializers.Serializer,), attrs)
+
+
+def synthetic_viewset(serializer):
+    """Unrouted viewset, so generators fall back to default urls."""
+    return type(
+        "BenchmarkViewSet",
+        (viewsets.GenericViewSet,),
+        {
+            "serializer_class": serializer,
+            "queryset": synthetic_model().objects.none(),
+            "pagination_class": pagination.PageNumberPagination,
+        },
+    )
+
+
+def measure(func, repeat, setup=None):
+    """
+    Median seconds of repeat calls to func, and peak bytes allocated by one
+    more call traced by tracemalloc, which would skew the timings. setup()
+    runs untimed before every call, its result is passed to func.
+    """
+    setup = setup or (lambda: None)
+    timings = []
+    for _ in range(repeat):
+        arg = setup()
+        gc.collect()
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    arg = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": statistics.median(timings), "peak_bytes": peak}
+
+
+def bench_form(width=200, depth=0, choices=10, repeat=5):
+    """Time and peak memory of each VueForm phase."""
+    form = VueForm(synthetic_serializer(width, depth, choices))
+    return {
+        "init": measure(
+            VueForm, repeat, lambda: synthetic_serializer(width, depth, choices)
+        ),
+        "init_cached": measure(lambda _: VueForm(form.serializer), repeat),
+        "error_messages": measure(lambda _: form.error_messages(), repeat),
+        "data": measure(lambda _: form.data, repeat),
+        "py_to_js": measure(py_to_js, repeat, lambda: form.data),
+        "script": measure(lambda _: form.script(), repeat),
+        "render": measure(lambda _: form.render(), repeat),
+    }
+
+
+def bench_list(width=200, depth=0, choices=10, repeat=5):
+    """Time and peak memory of each ListGenerator phase."""
+    viewset = synthetic_viewset(synthetic_serializer(width, depth, choices))
+    generator = ListGenerator(viewset)
+    return {
+        "init": measure(
+            ListGenerator,
+            repeat,
+            lambda: synthetic_viewset(synthetic_serializer(width, depth, choices)),
+        ),
+        "init_cached": measure(lambda _: ListGenerator(viewset), repeat),
+        "script": measure(lambda _: generator.script(), repeat),
+        "render": measure(lambda _: generator.render(), repeat),
+    }
+
+
+BENCHMARKS = {"form": bench_form, "list": bench_list}
+
+
+def environment():
+    return {
+        "django_vue_generator": __version__,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "djangorestframework": rest_framework.VERSION,
+        "platform": platform.platform(),
+    }
+
+
+def run_benchmarks(cases=MATRIX, generators=tuple(BENCHMARKS), repeat=5):
+    """
+    Runs every generator for every case, yielding one json-serializable
+    result per run so progress can be reported while the rest runs.
+    """
+    for case, generator in itertools.product(cases, generators):
+        phases = BENCHMARKS[generator](repeat=repeat, **case)
+        yield {
+            "generator": generator,
+            **case,
+            "phases": phases,
+            "total_seconds": sum(phase["seconds"] for phase in phases.values()),
+        }
@@ -0,0 +1,160 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+FRONTEND_DIR = "frontend"
+BUNDLE_DIR = os.path.join(FRONTEND_DIR, "static", "frontend")
+BUILD_STATE = os.path.join(FRONTEND_DIR, ".vuegen-build.json")
+# everything yarn build reads, relative to FRONTEND_DIR
+SOURCES = [
+    "src",
+    "public",
+    "package.json",
+    "yarn.lock",
+    "package-lock.json",
+    "vue.config.js",
+    "babel.config.js",
+    ".eslintrc.json",
+    ".browserslistrc",
+]
+
+Bundle = namedtuple("Bundle", ["path", "size", "gzipped", "initial"])
+
+# files loaded by index.html itself, the rest are lazy chunks
+INITIAL_RE = re.compile(
+    r"""<script[^>]*\ssrc=["']?([^"'\s>]+)|<link(?=[^>]*rel=["']?stylesheet)[^>]*\shref=["']?([^"'\s>]+)"""
+)
+
+
+def initial_files(index_html):
+    with open(index_html) as f:
+        html = f.read()
+    return {
+        os.path.basename(script or style) for script, style in INITIAL_RE.findall(html)
+    }
+
+
+def bundle_sizes(root=BUNDLE_DIR):
+    """Size and gzipped size of built js and css files, biggest first."""
+    index = os.path.join(root, "index.html")
+    initial = initial_files(index) if os.path.exists(index) else set()
+    bundles = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if not name.endswith((".js", ".css")):
+                continue
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            bundles.append(
+                Bundle(
+                    os.path.relpath(path, root),
+                    len(data),
+                    len(gzip.compress(data)),
+                    name in initial,
+                )
+            )
+    return sorted(bundles, key=lambda b: (-b.size, b.path))
+
+
+def kb(size):
+    return f"{size / 1024:.1f} KiB"
+
+
+def bundle_report(bundles):
+    width = max([len("file")] + [len(b.path) for b in bundles])
+    yield f"{'file':<{width}}  {'size':>12}  {'gzipped':>12}  loaded"
+    for b in bundles:
+        loaded = "initial" if b.initial else "lazy"
+        yield f"{b.path:<{width}}  {kb(b.size):>12}  {kb(b.gzipped):>12}  {loaded}"
+    for loaded in (True, False):
+        selected = [b for b in bundles if b.initial == loaded]
+        yield (
+            f"{'initial' if loaded else 'lazy'}: {len(selected)} files, "
+            f"{kb(sum(b.size for b in selected))}, "
+            f"{kb(sum(b.gzipped for b in selected))} gzipped"
+        )
+
+
+def source_files(root=FRONTEND_DIR):
+    for name in SOURCES:
+        path = os.path.join(root, name)
+        if os.path.isfile(path):
+            yield path
+        for directory, dirs, files in os.walk(path):
+            dirs.sort()
+            for file in sorted(files):
+                yield os.path.join(directory, file)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_hash(root=FRONTEND_DIR):
+    """Hash of the names and contents of all build inputs."""
+    digest = hashlib.sha256()
+    for path in source_files(root):
+        digest.update(f"{os.path.relpath(path, root)}:{file_digest(path)}\n".encode())
+    return digest.hexdigest()
+
+
+def snapshot(root=FRONTEND_DIR):
+    """mtime and size of build inputs, cheap enough to poll for changes."""
+    snap = {}
+    for path in source_files(root):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        snap[path] = st.st_mtime_ns, st.st_size
+    return snap
+
+
+def load_build_state(path=BUILD_STATE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_build_state(state, path=BUILD_STATE):
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def outputs(root=BUNDLE_DIR):
+    """Content digest and mtime of every built file."""
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            files[os.path.relpath(path, root)] = (
+                file_digest(path),
+                os.stat(path).st_mtime,
+            )
+    return files
+
+
+def restore_mtimes(before, root=BUNDLE_DIR):
+    """
+    Gives rebuilt files whose content did not change their mtime from before,
+    so collectstatic, which copies files newer than the collected ones, only
+    copies what changed. Returns the paths of changed files.
+    """
+    changed = []
+    for path, (digest, _) in outputs(root).items():
+        if path in before and before[path][0] == digest:
+            mtime = before[path][1]
+            os.utime(os.path.join(root, path), (mtime, mtime))
+        else:
+            changed.append(path)
+    return sorted(changed)
@@ -0,0 +1,97 @@
+"""
+Thin client for manage.py vuegen_server. It only uses the standard library,
+so it starts in milliseconds instead of booting Django:
+
+    python -m django_vue_generator.client app.views.BookViewSet --write
+    python -m django_vue_generator.client "app.views.*ViewSet" -g list --write
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+
+# Request: {"generator": "form", "targets": [...], "write": bool, "force": bool}
+# Response: {"content": "..."} without write, {"lines": [...]} with it,
+# either with "errors": [...], or {"restart": true} when the server restarts
+# to pick up changed models or settings and the request has to be sent again.
+SOCKET_PATH = os.environ.get("VUEGEN_SOCKET", ".vuegen.sock")
+GENERATORS = ["form", "list", "virtual"]
+
+
+def connect(path=SOCKET_PATH, timeout=0):
+    """Connected socket, waiting up to timeout seconds for the server."""
+    deadline = time.monotonic() + timeout
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+            return sock
+        except OSError:
+            sock.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+
+def send(request, path=SOCKET_PATH, restart_timeout=30):
+    """Response of the server to request, sent again if the server restarted."""
+    timeout = 0
+    while True:
+        with connect(path, timeout) as sock:
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection")
+        response = json.loads(line)
+        if not response.get("restart"):
+            return response
+        timeout = restart_timeout
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m django_vue_generator.client",
+        description="Generate components with a running manage.py vuegen_server",
+    )
+    parser.add_argument(
+        "targets", metavar="viewset", nargs="+", help="dotted paths or wildcards"
+    )
+    parser.add_argument("-g", "--generator", choices=GENERATORS, default="form")
+    parser.add_argument(
+        "--write", help="Write to file insted of stdout", action="store_true"
+    )
+    parser.add_argument(
+        "--force",
+        help="Write even if serializer and viewset did not change",
+        action="store_true",
+    )
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    args = parser.parse_args(argv)
+    try:
+        response = send(
+            {
+                "generator": args.generator,
+                "targets": args.targets,
+                "write": args.write,
+                "force": args.force,
+            },
+            args.socket,
+        )
+    except OSError as e:
+        sys.stderr.write(f"Can't reach {args.socket}, is vuegen_server running? {e}\n")
+        return 2
+    if response.get("content") is not None:
+        sys.stdout.write(response["content"])
+    for line in response.get("lines", []):
+        sys.stdout.write(f"{line}\n")
+    for error in response.get("errors", []):
+        sys.stderr.write(f"{error}\n")
+    return 1 if response.get("errors") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
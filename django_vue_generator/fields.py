@@ -0,0 +1,216 @@
+import operator
+import re
+from collections import OrderedDict, defaultdict
+
+from rest_framework import serializers
+from rest_framework.fields import iter_options
+from rest_framework.utils.field_mapping import ClassLookupDict
+
+from django_vue_generator.manifest import field_inputs
+from django_vue_generator.profiling import phase
+
+default_style = ClassLookupDict(
+    {
+        serializers.Field: {"tag": "input", "input_type": "text"},
+        serializers.EmailField: {"tag": "input", "input_type": "email"},
+        serializers.URLField: {"tag": "input", "input_type": "url"},
+        serializers.IntegerField: {"tag": "input", "input_type": "number"},
+        serializers.FloatField: {"tag": "input", "input_type": "number"},
+        serializers.DateTimeField: {"tag": "input", "input_type": "datetime-local"},
+        serializers.DateField: {"tag": "input", "input_type": "date"},
+        serializers.TimeField: {"tag": "input", "input_type": "time"},
+        serializers.FileField: {"tag": "input", "input_type": "file"},
+        serializers.BooleanField: {"tag": "checkbox"},
+        serializers.ChoiceField: {"tag": "select",},  # Also valid: 'radio'
+        serializers.MultipleChoiceField: {
+            "tag": "select_multiple",  # Also valid: 'checkbox_multiple'
+        },
+        serializers.RelatedField: {"tag": "select",},  # Also valid: 'radio'
+        serializers.ManyRelatedField: {
+            "tag": "select multiple",  # Also valid: 'checkbox_multiple'
+        },
+        serializers.Serializer: {"tag": "fieldset"},
+        serializers.ListSerializer: {"tag": "list_fieldset"},
+        serializers.ListField: {"tag": "list_field"},
+        serializers.DictField: {"tag": "dict_field"},
+        serializers.FilePathField: {"tag": "input", "input_type": "file"},
+        serializers.JSONField: {"tag": "textarea",},
+    }
+)
+
+ERROR_MESSAGE_RE = re.compile("(required|invalid|(min|max)_(value|length))")
+
+
+def error_messages(field):
+    # formatted once per message with one mapping per field
+    attrs = defaultdict(str, field.__dict__)
+    messages = {}
+    for err, msg in field.error_messages.items():
+        if not ERROR_MESSAGE_RE.match(err) or (
+            err == "required" and not field.required
+        ):
+            continue
+        msg = msg.format_map(attrs)
+        if "None" not in msg and '""' not in msg:
+            messages[err] = msg
+    return messages
+
+
+def option_source(relation):
+    """
+    What iter_options needs to list the objects of a related field: its
+    queryset, functions for the value and text of an option and the cutoff.
+    The functions only refer to the field when it overrides DRF's
+    to_representation or display_value.
+    """
+    if not isinstance(relation, serializers.RelatedField) or relation.queryset is None:
+        return None
+    cls = type(relation)
+    if (
+        cls.to_representation is serializers.PrimaryKeyRelatedField.to_representation
+        and relation.pk_field is None
+    ):
+        value = operator.attrgetter("pk")
+    elif cls.to_representation is serializers.SlugRelatedField.to_representation:
+        value = operator.attrgetter(relation.slug_field)
+    else:
+        value = relation.to_representation
+    if cls.display_value is serializers.RelatedField.display_value:
+        text = str
+    else:
+        text = relation.display_value
+    return (
+        relation.queryset,
+        value,
+        text,
+        relation.html_cutoff,
+        relation.html_cutoff_text,
+    )
+
+
+class FieldInfo:
+    """
+    Frozen description of a bound serializer field with everything generators
+    need, so that serializer().fields is only built once per serializer class.
+    It doesn't keep the field or its serializer.
+    """
+
+    __slots__ = (
+        "name",
+        "label",
+        "field_class",
+        "tag",
+        "input_type",
+        "source",
+        "read_only",
+        "required",
+        "validators",
+        "min_length",
+        "max_length",
+        "min_value",
+        "max_value",
+        "choices",
+        "has_options",
+        "relation",
+        "related_model",
+        "slug_field",
+        "many",
+        "children",
+        "error_messages",
+        "inputs",
+        "option_source",
+    )
+
+    def __init__(self, name, field):
+        style = default_style[field]
+        relation = getattr(field, "child_relation", field)
+        nested = getattr(field, "child", field)
+        queryset = getattr(relation, "queryset", None)
+        values = {
+            "name": name,
+            "label": field.label,
+            "field_class": type(field),
+            "tag": style["tag"],
+            "input_type": style.get("input_type"),
+            "source": field.source,
+            "read_only": field.read_only,
+            "required": field.required,
+            "validators": tuple(field.validators),
+            "has_options": hasattr(field, "iter_options"),
+            # RelatedField choices come from the database, see iter_options()
+            "choices": self.choices_of(field)
+            if isinstance(field, serializers.ChoiceField)
+            else None,
+            "relation": type(relation)
+            if isinstance(relation, serializers.RelatedField)
+            else None,
+            "related_model": queryset.model if queryset is not None else None,
+            "slug_field": getattr(relation, "slug_field", None),
+            "many": isinstance(
+                field, (serializers.ManyRelatedField, serializers.ListSerializer)
+            ),
+            "children": describe_fields(nested.fields)
+            if isinstance(nested, serializers.Serializer)
+            else None,
+            "error_messages": error_messages(field),
+            "inputs": field_inputs(field),
+            "option_source": option_source(relation),
+        }
+        for k in ["min", "max"]:
+            for f in ["length", "value"]:
+                values[f"{k}_{f}"] = getattr(field, f"{k}_{f}", None)
+        for k, v in values.items():
+            object.__setattr__(self, k, v)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is frozen")
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}: {self.field_class.__name__}>"
+
+    @staticmethod
+    def choices_of(field):
+        with phase("options"):
+            return tuple(
+                (option.value, option.display_text) for option in field.iter_options()
+            )
+
+    def iter_options(self):
+        """(value, text) pairs, queries the database for related fields."""
+        if self.choices is not None:
+            return iter(self.choices)
+        if self.option_source is None:
+            return iter(())
+        queryset, value, text, cutoff, cutoff_text = self.option_source
+        with phase("options"):
+            # like RelatedField.iter_options
+            choices = OrderedDict(
+                (value(obj), text(obj)) for obj in queryset.all()[:cutoff]
+            )
+            return iter(
+                [
+                    (option.value, option.display_text)
+                    for option in iter_options(choices, cutoff, cutoff_text)
+                ]
+            )
+
+
+def describe_fields(fields):
+    return tuple(FieldInfo(name, field) for name, field in fields.items())
+
+
+_cache = {}
+
+
+def describe(serializer_class):
+    """
+    FieldInfo for every field of serializer_class, built once per process.
+    """
+    if serializer_class not in _cache:
+        with phase("fields"):
+            _cache[serializer_class] = describe_fields(serializer_class().fields)
+    return _cache[serializer_class]
+
+
+def clear():
+    _cache.clear()
@@ -1,75 +1,113 @@
-import re
-from collections import defaultdict
-
-from django.urls import get_resolver
-from rest_framework import serializers
-from rest_framework.utils.field_mapping import ClassLookupDict
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import filters, serializers
 
+from django_vue_generator.api import api_import, resource_names
+from django_vue_generator.fields import default_style, describe
+from django_vue_generator.manifest import stable
+from django_vue_generator.resolver import model_viewset, viewset_urls
+from django_vue_generator.runtime import runtime_import
 from django_vue_generator.utils import vuetify
 from django_vue_generator.vue import Vue, js_func, py_to_js, js_str
 
-default_style = ClassLookupDict(
-    {
-        serializers.Field: {"tag": "input", "input_type": "text"},
-        serializers.EmailField: {"tag": "input", "input_type": "email"},
-        serializers.URLField: {"tag": "input", "input_type": "url"},
-        serializers.IntegerField: {"tag": "input", "input_type": "number"},
-        serializers.FloatField: {"tag": "input", "input_type": "number"},
-        serializers.DateTimeField: {"tag": "input", "input_type": "datetime-local"},
-        serializers.DateField: {"tag": "input", "input_type": "date"},
-        serializers.TimeField: {"tag": "input", "input_type": "time"},
-        serializers.FileField: {"tag": "input", "input_type": "file"},
-        serializers.BooleanField: {"tag": "checkbox"},
-        serializers.ChoiceField: {"tag": "select",},  # Also valid: 'radio'
-        serializers.MultipleChoiceField: {
-            "tag": "select_multiple",  # Also valid: 'checkbox_multiple'
-        },
-        serializers.RelatedField: {"tag": "select",},  # Also valid: 'radio'
-        serializers.ManyRelatedField: {
-            "tag": "select multiple",  # Also valid: 'checkbox_multiple'
-        },
-        serializers.Serializer: {"tag": "fieldset"},
-        serializers.ListSerializer: {"tag": "list_fieldset"},
-        serializers.ListField: {"tag": "list_field"},
-        serializers.DictField: {"tag": "dict_field"},
-        serializers.FilePathField: {"tag": "input", "input_type": "file"},
-        serializers.JSONField: {"tag": "textarea",},
+
+def label_field(viewset, model):
+    """Model field most likely to be a human readable name of the object."""
+    candidates = [
+        name.lstrip("^=@$") for name in getattr(viewset, "search_fields", None) or []
+    ]
+    candidates += ["name", "title", "username", "email"]
+    candidates += [
+        f.name for f in model._meta.fields if isinstance(f, models.CharField)
+    ]
+    for name in candidates:
+        try:
+            return model._meta.get_field(name).name
+        except FieldDoesNotExist:
+            pass
+    return model._meta.pk.name
+
+
+def search_param(viewset):
+    """Query parameter the viewset searches with, None if it can't search."""
+    if not getattr(viewset, "search_fields", None):
+        return None
+    for backend in getattr(viewset, "filter_backends", None) or []:
+        if issubclass(backend, filters.SearchFilter):
+            return backend.search_param
+    return None
+
+
+def related_options(field):
+    """
+    Describes how to load options of a related field page by page through the
+    api.js resource of the related model's viewset, and whether options of
+    selected values can be retrieved one by one.
+    None if there is no such viewset and options have to be inlined.
+    """
+    if field.read_only or not (
+        field.relation
+        and issubclass(
+            field.relation,
+            (serializers.PrimaryKeyRelatedField, serializers.SlugRelatedField),
+        )
+    ):
+        return None
+    model = field.related_model
+    viewset = model is not None and model_viewset(model)
+    resource = viewset and resource_names().get(viewset)
+    if not resource:
+        return None
+    value = field.slug_field or model._meta.pk.name
+    lookup = getattr(viewset, "lookup_field", "pk")
+    return {
+        "resource": resource,
+        "value": value,
+        "label": label_field(viewset, model),
+        "search_param": search_param(viewset),
+        "retrieve": bool(viewset_urls(viewset).retrieve_url)
+        and value in (lookup, lookup == "pk" and model._meta.pk.name),
     }
-)
 
 
 class VueForm(Vue):
     postfix = "Form"
+    packages = ["vuelidate", "vue-resource"]
 
     def __init__(self, viewset):
-        if isinstance(viewset, serializers.Serializer):
+        if isinstance(viewset, type) and issubclass(
+            viewset, serializers.BaseSerializer
+        ):
             serializer = viewset
+            self.viewset = None
             self.list_url = None
             self.retrieve_url = None
         else:
-            list_url = [
-                url
-                for callback, url in get_resolver().reverse_dict.items()
-                if getattr(callback, "cls", None) == viewset
-                and "create" in getattr(callback, "actions", {}).values()
-            ]
-            self.list_url = list_url and list_url[0][0][0][0]
-            retrieve_url = [
-                url
-                for callback, url in get_resolver().reverse_dict.items()
-                if getattr(callback, "cls", None) == viewset
-                and "update" in getattr(callback, "actions", {}).values()
-            ]
-            self.retrieve_url = (
-                retrieve_url and retrieve_url[0][0][0][0].rsplit("/", 2)[0]
-            )
+            self.viewset = viewset
+            self.list_url, self.retrieve_url, _ = viewset_urls(viewset)
             serializer = viewset().get_serializer_class()
         self.serializer = serializer
         self.model_name = self.serializer.Meta.model._meta.model_name
         self.pk_name = self.serializer.Meta.model._meta.pk.name
         self.component_name = f"{self.model_name.title()}{self.postfix}"
         self.filename = f"frontend/src/components/{self.component_name}.vue"
-        self.fields = self.serializer().fields.items()
+        self.fields = [(field.name, field) for field in describe(self.serializer)]
+        self.related = {}
+        for name, field in self.fields:
+            options = related_options(field)
+            if options:
+                self.related[name] = options
+
+    def inputs(self):
+        return {
+            "generator": stable(type(self)),
+            "serializer": stable(self.serializer),
+            "fields": {name: field.inputs for name, field in self.fields},
+            "urls": [self.list_url, self.retrieve_url],
+            "api": resource_names().get(self.viewset),
+            "pk_name": self.pk_name,
+            "related": self.related,
+        }
 
     def template(self):
         return f"""<div class="form pt-6">
@@ -93,13 +131,10 @@ class VueForm(Vue):
 
     def form_fields(self):
         for name, field in self.fields:
-            style = default_style[field]
-            tag = style["tag"]
-            if style.get("input_type", "") == "file":
+            tag = field.tag
+            if field.input_type == "file":
                 continue
-            input_type = (
-                ("input_type" in style) and f' type="{style["input_type"]}"' or ""
-            )
+            input_type = field.input_type and f' type="{field.input_type}"' or ""
             if field.read_only:
                 tag = "input"
                 input_type = ' type="hidden"'
@@ -108,23 +143,54 @@ class VueForm(Vue):
                    :class="{{ 'hasError': $v.form.{name}.$error }}">
                    <strong v-if="errors.{name}">{{{{errors.{name}}}}}</strong>
                   <label class="mr-2 font-bold text-grey">{field.label}</label>"""
-            yield f"""<{tag}{input_type} name="{name}" v-model="form.{name}"{'' if hasattr(field, 'iter_options') else '/'}>"""
-            if hasattr(field, "iter_options"):
+            if name in self.related:
+                yield from self.related_select(name, tag)
+                yield """\n</div>"""
+                continue
+            yield f"""<{tag}{input_type} name="{name}" v-model="form.{name}"{'' if field.has_options else '/'}>"""
+            if field.has_options:
                 yield f"""<option :value="k" v-for="(v, k) in options.{name}" :key="k">{{{{v}}}}</option>"""
                 yield f"""</{tag.split()[0]}>"""
             if not field.read_only:
                 yield """\n</div>"""
 
+    def related_select(self, name, tag):
+        """
+        Select which loads options page by page, searchable when the related
+        viewset has a SearchFilter.
+        """
+        if self.related[name]["search_param"]:
+            yield f"""<input type="search" v-model="related.{name}.search" @input="searchRelated('{name}')" placeholder="Search">"""
+        yield f"""<{tag} name="{name}" v-model="form.{name}">"""
+        yield f"""<option v-for="o in relatedOptions('{name}')" :value="o.value" :key="o.value">{{{{o.text}}}}</option>"""
+        yield f"""</{tag.split()[0]}>"""
+        yield f"""<button type="button" v-if="related.{name}.next" :disabled="related.{name}.loading" @click="loadRelated('{name}')">More</button>"""
+
     props = ["pk"]
 
-    imports = """import {required, numeric, maxValue, minValue, maxLength, minLength, url, email} from "vuelidate/lib/validators";
+    @property
+    def imports(self):
+        imports = """import {required, numeric, maxValue, minValue, maxLength, minLength, url, email} from "vuelidate/lib/validators";
             import Vuelidate from 'vuelidate';
             import Vue from 'vue'
             Vue.use(Vuelidate);
             const alwaysInvalid = (value) => false;
             """
+        if self.list_url or self.retrieve_url:
+            imports += api_import(self.viewset, self.list_url, self.retrieve_url)
+        if self.related:
+            imports += "import * as resources from '../api';\n"
+        if any(spec["search_param"] for spec in self.related.values()):
+            imports += runtime_import("debounce")
+        return imports
+
+    @property
+    def mounted(self):
+        return (
+            "".join(f"this.loadRelated('{name}', true);" for name in self.related)
+            + "if(this.pk){this.fetch(this.pk);}"
+        )
 
-    mounted = "if(this.pk){this.fetch(this.pk);}"
     # validations = ", "\n".join(self.validations())
 
     watch = {"pk": "this.fetch(newVal);"}
@@ -135,17 +201,29 @@ class VueForm(Vue):
         fields = {}
         for name, field in self.fields:
             fields[name] = ""
-            if hasattr(field, "iter_options"):
-                options[name] = {
-                    opt.value: opt.display_text for opt in field.iter_options()
-                }
-        return {
+            if field.has_options and name not in self.related:
+                options[name] = dict(field.iter_options())
+        data = {
             "serverErrors": False,
             "errors": {},
             "form": fields,
             "options": options,
             "error_messages": self.error_messages(),
         }
+        if self.related:
+            data["related"] = {
+                name: {
+                    **spec,
+                    "search": "",
+                    "options": [],
+                    # selected values which are not in the loaded pages
+                    "selected": [],
+                    "next": None,
+                    "loading": False,
+                }
+                for name, spec in self.related.items()
+            }
+        return data
 
     @property
     def validations(self):
@@ -166,13 +244,12 @@ class VueForm(Vue):
 
     def validation_items(self):
         for name, field in self.fields:
-            style = default_style[field]
             validators = [
                 v
                 for v in [
                     field.required and name != self.pk_name and "required",
-                    style.get("input_type", None) in ("number", "url", "email")
-                    and f"{style['input_type'].replace('number', 'numeric')}",
+                    field.input_type in ("number", "url", "email")
+                    and f"{field.input_type.replace('number', 'numeric')}",
                     *[
                         getattr(field, f"{k}_{f}", None)
                         and f"{k}_{f}: {k}{f.title()}({getattr(field, f'{k}_{f}', None)})"
@@ -185,6 +262,62 @@ class VueForm(Vue):
             yield name, js_str(f'{{{", ".join(validators)}}}')
 
     def methods(self):
+        if any(spec["search_param"] for spec in self.related.values()):
+            yield "searchRelated", js_func(
+                "name",
+                """
+            debounce(this, `related:${name}`, () => this.loadRelated(name, true));
+            """,
+            )
+        if self.related:
+            yield "loadRelated", js_func(
+                ["name", "reset"],
+                """
+            const rel = this.related[name];
+            if (!reset && !rel.next) return;
+            // only the latest request of the field resolves, e.g. after typing on
+            const channel = `related:${name}`;
+            const resource = resources[rel.resource];
+            rel.loading = true;
+            (reset
+                ? resource.list(this, rel.search_param && rel.search ? {[rel.search_param]: rel.search} : {}, channel)
+                : resource.follow(this, rel.next, channel)
+            ).then(r => {
+                const results = Array.isArray(r) ? r : r.results;
+                const options = results.map(o => ({value: o[rel.value], text: o[rel.label] || o[rel.value]}));
+                rel.options = reset ? options : rel.options.concat(options);
+                rel.next = Array.isArray(r) ? null : r.next;
+                rel.loading = false;
+            }, () => {
+                rel.loading = false;
+            });
+            """,
+            )
+            yield "loadSelected", js_func(
+                "name",
+                """
+            // options for values of the fetched object, which may be on any page
+            const rel = this.related[name];
+            const value = this.form[name];
+            const values = (Array.isArray(value) ? value : [value]).filter(v => v !== null && v !== undefined && v !== '');
+            const loaded = new Set(rel.options.map(o => String(o.value)));
+            rel.selected = values.filter(v => !loaded.has(String(v))).map(v => ({value: v, text: v}));
+            if (!rel.retrieve) return;
+            rel.selected.forEach(option => {
+                resources[rel.resource].retrieve(this, option.value, `related:${name}:${option.value}`).then(o => {
+                    option.text = o[rel.label] || option.value;
+                });
+            });
+            """,
+            )
+            yield "relatedOptions", js_func(
+                "name",
+                """
+            const rel = this.related[name];
+            const loaded = new Set(rel.options.map(o => String(o.value)));
+            return rel.options.concat(rel.selected.filter(o => !loaded.has(String(o.value))));
+            """,
+            )
         yield "submit", js_func(
             "",
             """
@@ -207,16 +340,19 @@ class VueForm(Vue):
         """,
         )
         if self.retrieve_url:
+            load_selected = "".join(
+                f"this.loadSelected('{name}');" for name in self.related
+            )
             yield "fetch", js_func(
                 "pk",
                 f"""
-            this.$http.get(`{self.retrieve_url}/${{pk}}/`).then(r => r.json()).then(r => {{this.form = r;}});
+            api.retrieve(this, pk).then(r => {{this.form = {{...r}};{load_selected}}});
             """,
             )
             yield "update", js_func(
                 "",
                 f"""
-            this.$http.put(`{self.retrieve_url}/${{this.pk}}/`, {{...this.form}}).then(r => r.json()).then(
+            api.update(this.pk, {{...this.form}}).then(
             r => {{
                 this.serverErrors = false;
                 this.form = r;
@@ -236,7 +372,7 @@ class VueForm(Vue):
             yield "create", js_func(
                 "",
                 f""" 
-            this.$http.post('{self.list_url}', {{...this.form}}).then(r => r.json()).then(
+            api.create({{...this.form}}).then(
                 r => {{
                     this.serverErrors = false;
                     this.form = r;
@@ -254,15 +390,4 @@ class VueForm(Vue):
             )
 
     def error_messages(self):
-        return {
-            name: {
-                err: msg.format_map(defaultdict(lambda: "", field.__dict__))
-                for err, msg in field.error_messages.items()
-                if re.match("(required|invalid|(min|max)_(value|length))", err)
-                and "None"
-                not in msg.format_map(defaultdict(lambda: "", field.__dict__))
-                and '""' not in msg.format_map(defaultdict(lambda: "", field.__dict__))
-                and not (not field.required and err == "required")
-            }
-            for name, field in self.fields
-        }
+        return {name: dict(field.error_messages) for name, field in self.fields}
@@ -1,10 +1,24 @@
-from django.urls import get_resolver
+import warnings
+
 from rest_framework import serializers, pagination
+from django_vue_generator.api import api_import, resource_names
+from django_vue_generator.fields import describe
+from django_vue_generator.manifest import stable
+from django_vue_generator.mixins import DEFAULT_LIMIT, FIELDS_PARAM
+from django_vue_generator.resolver import viewset_urls
+from django_vue_generator.runtime import runtime_import
 from django_vue_generator.vue import js_func, js_str, Vue
 
+PAGINATION_STYLES = [
+    ("page", pagination.PageNumberPagination),
+    ("limit", pagination.LimitOffsetPagination),
+    ("cursor", pagination.CursorPagination),
+]
+
 
 class ListGenerator(Vue):
     postfix = "List"
+    packages = ["vue-resource"]
 
     def __init__(
         self, viewset, table_tag="table", row_tag="tr", column_tag="td", header_tag="th"
@@ -13,20 +27,7 @@ class ListGenerator(Vue):
         self.row_tag = row_tag
         self.column_tag = column_tag
         self.header_tag = header_tag
-        list_url = [
-            url
-            for callback, url in get_resolver().reverse_dict.items()
-            if getattr(callback, "cls", None) == viewset
-            and "create" in getattr(callback, "actions", {}).values()
-        ]
-        self.list_url = list_url and list_url[0][0][0][0]
-        retrieve_url = [
-            url
-            for callback, url in get_resolver().reverse_dict.items()
-            if getattr(callback, "cls", None) == viewset
-            and "update" in getattr(callback, "actions", {}).values()
-        ]
-        self.retrieve_url = retrieve_url and retrieve_url[0][0][0][0].rsplit("/", 2)[0]
+        self.list_url, self.retrieve_url, self.basename = viewset_urls(viewset)
         self.viewset = viewset
         serializer = viewset().get_serializer_class()
         self.serializer = serializer
@@ -34,7 +35,49 @@ class ListGenerator(Vue):
         self.pk_name = self.serializer.Meta.model._meta.pk.name
         self.component_name = f"{self.model_name.title()}{self.postfix}"
         self.filename = f"frontend/src/components/{self.component_name}.vue"
-        self.fields = self.serializer().fields.items()
+        self.fields = [(field.name, field) for field in describe(self.serializer)]
+        self.paging = self.pagination_style()
+
+    def pagination_style(self):
+        """
+        "page", "limit", "cursor" or None for unsupported pagination classes.
+        Lists of viewsets without pagination would load the whole table, so
+        they are not generated.
+        """
+        pagination_class = self.viewset.pagination_class
+        if pagination_class is None:
+            raise ValueError(
+                f"{self.viewset.__name__} has no pagination_class, so its list "
+                f"would load every object. Add mixins.DefaultPaginationMixin to "
+                f"the viewset or set a pagination_class."
+            )
+        for style, base in PAGINATION_STYLES:
+            if issubclass(pagination_class, base):
+                return style
+        warnings.warn(
+            f"{pagination_class.__name__} of {self.viewset.__name__} is not "
+            f"supported, its list only shows the first page"
+        )
+        return None
+
+    def inputs(self):
+        pagination_class = self.viewset.pagination_class
+        return {
+            "generator": stable(type(self)),
+            "viewset": stable(self.viewset),
+            "serializer": stable(self.serializer),
+            "fields": {name: field.inputs for name, field in self.fields},
+            "urls": [self.list_url, self.retrieve_url],
+            "api": resource_names().get(self.viewset),
+            "pk_name": self.pk_name,
+            "tags": [self.table_tag, self.row_tag, self.column_tag, self.header_tag],
+            "pagination": [
+                stable(pagination_class),
+                getattr(pagination_class, "page_size", None),
+                getattr(pagination_class, "default_limit", None),
+                getattr(pagination_class, "cursor_query_param", None),
+            ],
+        }
 
     def template(self):
         return "".join(self._template())
@@ -42,95 +85,157 @@ class ListGenerator(Vue):
     def _template(self):
         yield f'<div class="{self.model_name}_list">'
         yield f"<{self.table_tag}>"
+        yield from self._header()
+        yield from self._objects("objects")
+        yield f"</{self.table_tag}>"
+        yield from self.pagination()
+        yield "</div>"
+
+    def _header(self):
         yield f'<slot name="header" v-bind:object="object">'
         yield f"<{self.row_tag}>"
         for name, field in self.fields:
-            yield f"<{self.header_tag}>{field.label}</{self.header_tag}>"
+            yield f"""<{self.header_tag} v-if="showField('{name}')">{field.label}</{self.header_tag}>"""
         yield f"</{self.row_tag}>"
         yield f"</slot>"
-        yield f'<{self.row_tag} v-for="object in objects" :key="object.{self.pk_name}">'
+
+    def _objects(self, objects):
+        yield f'<{self.row_tag} v-for="object in {objects}" :key="object.{self.pk_name}">'
         yield f'<slot name="object" v-bind:object="object">'
         for name, field in self.fields:
-            yield f"<{self.column_tag}>{{{{ object.{name} }}}}</{self.column_tag}>"
+            yield f"""<{self.column_tag} v-if="showField('{name}')">{{{{ object.{name} }}}}</{self.column_tag}>"""
         yield f"</slot>"
         yield f"</{self.row_tag}>"
-        yield f"</{self.table_tag}>"
-        yield from self.pagination()
-        yield "</div>"
 
     def pagination(self):
-        if issubclass(self.viewset.pagination_class, pagination.PageNumberPagination):
+        if self.paging == "page":
             yield f'<slot name="pagination" :count="count" :page="page" :page_size="page_size">'
             yield '<select v-model="page">'
-            yield f'<option v-for="p in pages()" :key="p">{{{{ p }}}}</option>'
+            yield f'<option v-for="(p, i) in pages" :key="p || `gap${{i}}`" :value="p" :disabled="!p">{{{{ p || "…" }}}}</option>'
             yield f"</select>"
             yield f"</slot>"
-        elif issubclass(
-            self.viewset.pagination_class, pagination.LimitOffsetPagination
-        ):
+        elif self.paging == "limit":
             yield f'<slot name="pagination" :count="count" :offset="offset" :limit="limit">'
             yield '<select v-model="offset">'
-            yield f'<option v-for="[off, p] in offsets()" :key="p" :value="off">{{{{ p }}}}</option>'
+            yield f'<option v-for="([off, p], i) in offsets" :key="p || `gap${{i}}`" :value="off" :disabled="!p">{{{{ p || "…" }}}}</option>'
             yield f"</select>"
             yield f"</slot>"
-        else:
-            yield
+        elif self.paging == "cursor":
+            yield f'<slot name="pagination" :next="next" :previous="previous" :go="go">'
+            yield '<button :disabled="!previous" @click="go(previous)">&lt;</button>'
+            yield '<button :disabled="!next" @click="go(next)">&gt;</button>'
+            yield f"</slot>"
 
-    props = ["filters"]
+    # fields limits the columns requested from the server and rendered,
+    # see mixins.FieldsProjectionMixin
+    props = ["filters", "fields"]
+
+    @property
+    def imports(self):
+        return api_import(
+            self.viewset, self.list_url, self.retrieve_url
+        ) + runtime_import("debounce", "pageWindow")
 
     mounted = js_func("", """this.list(this.filters);""")
 
     def watch(self):
-        yield "filters", js_str(
-            """handler (newVal, oldVal) {
-        if(this.page) this.page=1;
-        if(this.offset) this.offset=0;
+        # a cursor is a position in the ordering, it stays valid for new filters
+        reset = {"page": "this.page=1;", "limit": "this.offset=0;"}.get(self.paging, "")
+        yield "filters", js_str(f"""{{handler (newVal, oldVal) {{
+        debounce(this, 'filters', () => {{
+        {reset}
         this.list(newVal);
-        }, deep: true"""
-        )
-        yield "page", "this.list(this.filters);"
-        yield "offset", "this.list(this.filters);"
+        }});
+        }}, deep: true}}""")
+        yield "fields", "this.list(this.filters);"
+        if self.paging == "page":
+            yield "page", "this.list(this.filters);"
+        elif self.paging == "limit":
+            yield "offset", "this.list(this.filters);"
+        elif self.paging == "cursor":
+            yield "cursor", "this.list(this.filters);"
 
     @property
     def data(self):
         yield "objects", []
-        yield "count", 0
-        if issubclass(self.viewset.pagination_class, pagination.PageNumberPagination):
+        pagination_class = self.viewset.pagination_class
+        if self.paging == "page":
+            yield "count", 0
             yield "page", 1
-            yield "page_size", self.viewset.pagination_class.page_size
-        elif issubclass(
-            self.viewset.pagination_class, pagination.LimitOffsetPagination
-        ):
-            yield "limit", self.viewset.pagination_class.default_limit
+            yield "page_size", pagination_class.page_size
+        elif self.paging == "limit":
+            yield "count", 0
+            default_limit = getattr(pagination_class, "default_limit", None)
+            yield "limit", default_limit or DEFAULT_LIMIT
             yield "offset", 0
+        elif self.paging == "cursor":
+            yield "cursor", None
+            yield "next", None
+            yield "previous", None
+
+    def computed(self):
+        # cached until count or the current page change, gaps are null
+        if self.paging == "page":
+            yield "pages", (
+                "return pageWindow(this.page, Math.ceil(this.count / this.page_size));"
+            )
+        elif self.paging == "limit":
+            yield "offsets", """
+        let current = Math.floor(this.offset / this.limit) + 1;
+        return pageWindow(current, Math.ceil(this.count / this.limit)).map(
+        p => p ? [(p - 1) * this.limit, p] : [null, null]
+        );"""
+
+    def page_params(self):
+        """js object with the pagination query parameters of the current page."""
+        pagination_class = self.viewset.pagination_class
+        if self.paging == "page":
+            return f"{{{pagination_class.page_query_param}:this.page}}"
+        if self.paging == "limit":
+            return (
+                f"{{{pagination_class.offset_query_param}:this.offset, "
+                f"{pagination_class.limit_query_param}:this.limit}}"
+            )
+        if self.paging == "cursor":
+            return f"this.cursor?{{{pagination_class.cursor_query_param}:this.cursor}}:{{}}"
+        return "{}"
+
+    def field_params(self):
+        """js object with the fields query parameter, see props."""
+        return f"this.fields?{{{FIELDS_PARAM}:['{self.pk_name}', ...this.fields].join(',')}}:{{}}"
 
     def methods(self):
+        if self.paging == "cursor":
+            # CursorPagination has no count, next and previous are links
+            paginated = """
+            this.next = r.next;
+            this.previous = r.previous;"""
+        else:
+            paginated = """
+            this.count = r.count;"""
         yield "list", js_func(
             "filters",
             f"""
-        let page_params=this.page?{{page:this.page}}:(this.limit?{{offset:this.offset, limit:this.limit}}:{{}});
-        this.$http.get('{self.list_url}', {{params:{{...page_params, ...filters}}}}).then(r => r.json()).then(
+        let page_params={self.page_params()};
+        let field_params={self.field_params()};
+        api.list(this, {{...page_params, ...field_params, ...filters}}).then(
         r => {{
         if(r.results) {{
-            this.objects = r.results;
-            this.count = r.count;
+            this.objects = r.results;{paginated}
         }} else {{
             this.objects = r;
         }}
         }}
         );""",
         )
-        yield "pages", """let res=[];
-        for(let i=1;i<=Math.ceil(this.count/this.page_size);i++){
-        res.push(i);
-        }
-        return res;"""
-        yield "offsets", """let res=[], j=1;
-        for(let i=0;i<=this.count;i+=this.limit){
-        res.push([i, j]);
-        j++;
-        }
-        return res;"""
+        yield "showField", js_func(
+            "name", "return !this.fields || this.fields.includes(name);"
+        )
+        if self.paging == "cursor":
+            yield "go", js_func(
+                "url",
+                f"""if(url) this.cursor = new URL(url, window.location.href).searchParams.get('{self.viewset.pagination_class.cursor_query_param}');""",
+            )
 
     # def get_filters(self):
     #     filters = []
@@ -156,3 +261,135 @@ class ListGenerator(Vue):
     #                         'params': {}
     #                     })
     #     return filters
+
+
+class VirtualListGenerator(ListGenerator):
+    """
+    List which only mounts the rows in view of a fixed height, scrollable
+    container and loads following pages (r.next) while scrolling.
+    At most buffer_pages pages are kept, pages dropped from the top are loaded
+    again from r.previous when scrolling back.
+    Rows need a fixed height of row_height pixels, see style().
+    """
+
+    row_height = 32
+    height = 480
+    buffer_pages = 10
+    # rows mounted above and below the visible ones
+    overscan = 5
+
+    def inputs(self):
+        return dict(
+            super().inputs(),
+            virtual=[self.row_height, self.height, self.buffer_pages, self.overscan],
+        )
+
+    def _template(self):
+        yield f'<div class="{self.model_name}_list {self.model_name}_list_virtual" ref="viewport" @scroll="onScroll">'
+        yield f"<{self.table_tag}>"
+        yield from self._header()
+        yield f"""<{self.row_tag} :style="{{height: top + 'px'}}"></{self.row_tag}>"""
+        yield from self._objects("visible")
+        yield f"""<{self.row_tag} :style="{{height: bottom + 'px'}}"></{self.row_tag}>"""
+        yield f"</{self.table_tag}>"
+        yield "</div>"
+
+    def style(self):
+        root = f".{self.model_name}_list_virtual"
+        return f"""{root} {{height: {self.height}px; overflow-y: auto;}}
+        {root} {self.row_tag} {{height: {self.row_height}px;}}
+        {root} {self.column_tag} {{white-space: nowrap; overflow: hidden; text-overflow: ellipsis;}}
+        {root} {self.header_tag} {{position: sticky; top: 0; background: inherit;}}"""
+
+    mounted = js_func(
+        "",
+        """this.viewportHeight = this.$refs.viewport.clientHeight;
+        this.list(this.filters);""",
+    )
+
+    def watch(self):
+        yield "filters", js_str(
+            "{handler (newVal, oldVal) {debounce(this, 'filters', () => this.list(newVal));}, deep: true}"
+        )
+        yield "fields", "this.list(this.filters);"
+
+    @property
+    def data(self):
+        # objects are the loaded pages, see computed
+        yield from ((k, v) for k, v in super().data if k != "objects")
+        yield "pages", []
+        yield "skipped", 0
+        yield "scrollTop", 0
+        yield "viewportHeight", self.height
+        yield "loading", False
+
+    def computed(self):
+        yield "objects", "return [].concat(...this.pages.map(p => p.objects));"
+        yield "first", (
+            f"return Math.max(0, Math.floor(this.scrollTop / {self.row_height}) "
+            f"- this.skipped - {self.overscan});"
+        )
+        yield "visible", (
+            f"return this.objects.slice(this.first, this.first + "
+            f"Math.ceil(this.viewportHeight / {self.row_height}) + {2 * self.overscan});"
+        )
+        yield "top", f"return (this.skipped + this.first) * {self.row_height};"
+        yield "bottom", (
+            f"return Math.max(0, this.objects.length - this.first - "
+            f"this.visible.length) * {self.row_height};"
+        )
+
+    def methods(self):
+        yield "toPage", js_func(
+            "r",
+            "return r.results ? {objects: r.results, next: r.next, previous: r.previous} : {objects: r};",
+        )
+        yield "list", js_func(
+            "filters",
+            f"""
+        let page_params={self.page_params()};
+        let field_params={self.field_params()};
+        this.pages = [];
+        this.skipped = 0;
+        this.scrollTop = this.$refs.viewport.scrollTop = 0;
+        this.loading = true;
+        api.list(this, {{...page_params, ...field_params, ...filters}}).then(this.toPage).then(
+        page => {{
+        this.pages = [page];
+        this.loading = false;
+        this.$nextTick(this.fill);
+        }}
+        );""",
+        )
+        yield "load", js_func(
+            "url, forward",
+            f"""
+        this.loading = true;
+        // a new list supersedes pages still loading
+        api.follow(this, url).then(this.toPage).then(
+        page => {{
+        if(forward) {{
+            this.pages.push(page);
+            if(this.pages.length > {self.buffer_pages}) this.skipped += this.pages.shift().objects.length;
+        }} else {{
+            this.skipped = Math.max(0, this.skipped - page.objects.length);
+            this.pages.unshift(page);
+            if(this.pages.length > {self.buffer_pages}) this.pages.pop();
+        }}
+        this.loading = false;
+        this.$nextTick(this.fill);
+        }}
+        );""",
+        )
+        yield "fill", f"""
+        if(this.loading || !this.pages.length) return;
+        let row = Math.floor(this.scrollTop / {self.row_height}) - this.skipped;
+        let rows = Math.ceil(this.viewportHeight / {self.row_height});
+        let first = this.pages[0], last = this.pages[this.pages.length - 1];
+        if(last.next && row + 2 * rows >= this.objects.length) this.load(last.next, true);
+        else if(first.previous && this.skipped && row < rows) this.load(first.previous, false);"""
+        yield "onScroll", """
+        this.scrollTop = this.$refs.viewport.scrollTop;
+        this.viewportHeight = this.$refs.viewport.clientHeight;
+        this.fill();"""
+        yield from ((k, v) for k, v in super().methods() if k == "showField")
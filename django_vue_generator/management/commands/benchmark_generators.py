@@ -0,0 +1,91 @@
+import itertools
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_vue_generator.benchmarks import (
+    BENCHMARKS,
+    MATRIX,
+    environment,
+    run_benchmarks,
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark form and list generation on synthetic serializers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--width", help="Numbers of fields", type=int, nargs="+", default=[200]
+        )
+        parser.add_argument(
+            "--depth",
+            help="Levels of nested serializers",
+            type=int,
+            nargs="+",
+            default=[0],
+        )
+        parser.add_argument(
+            "--choices",
+            help="Options of each ChoiceField",
+            type=int,
+            nargs="+",
+            default=[10],
+        )
+        parser.add_argument(
+            "--matrix",
+            help="Run the standard width, depth and choices matrix instead",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--generator",
+            choices=list(BENCHMARKS),
+            nargs="+",
+            default=["form"],
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", help="Also write results as json to this file")
+        parser.add_argument(
+            "--budget",
+            help="Fail if any run takes longer than this many seconds",
+            type=float,
+        )
+
+    def handle(self, *args, **options):
+        cases = (
+            MATRIX
+            if options["matrix"]
+            else [
+                {"width": w, "depth": d, "choices": c}
+                for w, d, c in itertools.product(
+                    options["width"], options["depth"], options["choices"]
+                )
+            ]
+        )
+        results = []
+        for result in run_benchmarks(cases, options["generator"], options["repeat"]):
+            results.append(result)
+            self.stdout.write(
+                f"{result['generator']} width={result['width']} "
+                f"depth={result['depth']} choices={result['choices']}"
+            )
+            for phase, m in result["phases"].items():
+                self.stdout.write(
+                    f"  {phase:<16}{m['seconds'] * 1000:10.2f} ms"
+                    f"{m['peak_bytes'] / 1024:12.1f} KiB peak"
+                )
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(
+                    {"environment": environment(), "results": results}, f, indent=2
+                )
+        slow = [
+            r
+            for r in results
+            if options["budget"] is not None and r["total_seconds"] > options["budget"]
+        ]
+        if slow:
+            raise CommandError(
+                f"{len(slow)} run(s) took longer than the budget of "
+                f"{options['budget']}s, slowest {max(r['total_seconds'] for r in slow):.3f}s"
+            )
@@ -1,7 +1,23 @@
+import json
+import os
+import time
+
 from django.core.management.base import BaseCommand
 from django.core import management
 import importlib
 
+from django_vue_generator.bundles import (
+    BUNDLE_DIR,
+    bundle_report,
+    bundle_sizes,
+    load_build_state,
+    outputs,
+    restore_mtimes,
+    save_build_state,
+    snapshot,
+    source_hash,
+)
+from django_vue_generator.process import recording, timing_report
 from django_vue_generator.utils import (
     vuetify,
     cd_back,
@@ -14,8 +30,86 @@ from django_vue_generator.utils import (
 class Command(BaseCommand):
     help = "Build frontend"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--report", help="Also write bundle sizes as json to this file"
+        )
+        parser.add_argument(
+            "--noinput",
+            "--no-input",
+            action="store_false",
+            dest="interactive",
+            help="Don't ask collectstatic for confirmation",
+        )
+        parser.add_argument(
+            "--force",
+            help="Build even if nothing changed since the last build",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--watch",
+            help="Keep rebuilding and collecting static files when sources change",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--interval",
+            help="Seconds between checks for changes with --watch",
+            type=float,
+            default=1.0,
+        )
+
     def handle(self, *args, **options):
         set_yarn_path()
-        with cd_back("frontend/"):
+        self.build(options["force"], options["report"])
+        management.call_command(
+            "collectstatic", interactive=options["interactive"] and not options["watch"]
+        )
+        if options["watch"]:
+            self.watch(options["interval"], options["report"])
+
+    def build(self, force=False, report=None):
+        """Runs yarn build unless sources are unchanged, returns whether it did."""
+        digest = source_hash()
+        state = load_build_state()
+        if (
+            not force
+            and state.get("source") == digest
+            and os.path.exists(os.path.join(BUNDLE_DIR, "index.html"))
+        ):
+            self.stdout.write("Frontend sources did not change, skipping yarn build")
+            return False
+        before = outputs() if os.path.exists(BUNDLE_DIR) else {}
+        with cd_back("frontend/"), recording() as timings:
             fail("yarn build")
-        management.call_command("collectstatic")
+        for line in timing_report(timings):
+            self.stdout.write(line)
+        # unchanged files keep their mtime so collectstatic skips them
+        changed = restore_mtimes(before)
+        save_build_state({"source": digest})
+        bundles = bundle_sizes()
+        for line in bundle_report(bundles):
+            self.stdout.write(line)
+        self.stdout.write(f"{len(changed)} built files changed")
+        if report:
+            with open(report, "w") as f:
+                json.dump([b._asdict() for b in bundles], f, indent=2)
+        return True
+
+    def watch(self, interval, report=None):
+        self.stdout.write("Watching frontend sources, press ctrl-c to stop")
+        last = snapshot()
+        try:
+            while True:
+                time.sleep(interval)
+                current = snapshot()
+                if current == last:
+                    continue
+                last = current
+                try:
+                    if self.build(report=report):
+                        management.call_command("collectstatic", interactive=False)
+                except OSError as e:
+                    # keep watching, the next save may fix it
+                    self.stderr.write(str(e))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,64 @@
+import importlib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from django_vue_generator.mixins import ListQueryMixin
+from django_vue_generator.queries import list_plan
+
+
+def list_page(viewset, params):
+    host = next(
+        (host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"),
+        "localhost",
+    )
+    request = APIRequestFactory().get("/", params, HTTP_HOST=host)
+    view = viewset.as_view({"get": "list"})
+    with CaptureQueriesContext(connection) as queries:
+        response = view(request)
+        response.render()
+    if response.status_code != 200:
+        raise CommandError(f"{viewset.__name__} list returned {response.status_code}")
+    return response.content, len(queries)
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the queries a generated list page runs, with and without ListQueryMixin"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "args",
+            metavar="viewset",
+            nargs="+",
+            help="""ViewSet. 
+            For example:
+            ./manage.py check_list_queries "app.views.BookViewSet" """,
+        )
+        parser.add_argument(
+            "--param",
+            help="Query parameter of the list request, like page=2",
+            action="append",
+            default=[],
+        )
+
+    def handle(self, *args, **options):
+        params = dict(param.split("=", 1) for param in options["param"])
+        for path in args:
+            mod, cls = path.rsplit(".", 1)
+            viewset = getattr(importlib.import_module(mod), cls)
+            plan = list_plan(viewset().get_serializer_class())
+            content, count = list_page(viewset, params)
+            optimized = type(viewset.__name__, (ListQueryMixin, viewset), {})
+            optimized_content, optimized_count = list_page(optimized, params)
+            self.stdout.write(f"{path}:")
+            self.stdout.write(f"    queryset = {plan.code('queryset')}")
+            self.stdout.write(
+                f"    queries: {count}, with ListQueryMixin: {optimized_count}"
+            )
+            if content != optimized_content:
+                raise CommandError(f"{path}: responses differ with ListQueryMixin")
@@ -1,8 +1,7 @@
 from django.core.management.base import BaseCommand
-from django.core import management
-import importlib
 
-from django_vue_generator.forms import VueForm
+from django_vue_generator.profiling import add_profile_arguments, profiled
+from django_vue_generator.project import generate_components
 
 
 class Command(BaseCommand):
@@ -13,21 +12,32 @@ class Command(BaseCommand):
             "args",
             metavar="viewset",
             nargs="+",
-            help="""ViewSet or serializer class. 
+            help="""ViewSet or serializer classes, wildcards in class names match
+            viewsets and serializers defined in that module.
             For example:
-            ./manage.py generate_vue_form "myapp.serializers.BookSerializer" > frontend/src/components/BookForm.vue""",
+            ./manage.py generate_vue_form "myapp.serializers.BookSerializer" > frontend/src/components/BookForm.vue
+            ./manage.py generate_vue_form "myapp.views.*ViewSet" --write""",
         )
         parser.add_argument(
             "--write", help="Write to file insted of stdout", action="store_true"
         )
+        parser.add_argument(
+            "--force",
+            help="Write even if serializer and viewset did not change",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--jobs",
+            help="Generate components in N parallel processes",
+            type=int,
+            default=1,
+        )
+        add_profile_arguments(parser)
 
     def handle(self, *args, **options):
-        mod, cls = args[0].rsplit(".", 1)
-        mod = importlib.import_module(mod)
-        obj = getattr(mod, cls)
-        generator = VueForm(obj)
-        if options["write"]:
-            with open(generator.filename, "w") as f:
-                f.write(generator.render())
-        else:
-            print(generator.render())
+        # stdout may be the component
+        with profiled(options, self.stderr):
+            self.generate(*args, **options)
+
+    def generate(self, *args, **options):
+        generate_components(self, args, "form", options)
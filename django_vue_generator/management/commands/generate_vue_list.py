@@ -1,10 +1,11 @@
 from django.core.management.base import BaseCommand
-from django.core import management
-import importlib
 
-from django_vue_generator.lists import ListGenerator
+from django_vue_generator.profiling import add_profile_arguments, profiled
+from django_vue_generator.project import generate_components
 
 TAG_PARAMS = ["table", "row", "column", "header"]
+# generator of each mode
+MODES = {"table": "list", "virtual": "virtual"}
 
 
 class Command(BaseCommand):
@@ -15,28 +16,43 @@ class Command(BaseCommand):
             "args",
             metavar="viewset",
             nargs="+",
-            help="""ViewSet. 
+            help="""ViewSet classes, wildcards in class names match viewsets
+            defined in that module.
             For example:
-            ./manage.py generate_vue_form "app.views.BookViewSet" > frontend/src/components/BookList.vue""",
+            ./manage.py generate_vue_list "app.views.BookViewSet" > frontend/src/components/BookList.vue
+            ./manage.py generate_vue_list "app.views.*ViewSet" --write""",
         )
         for k in TAG_PARAMS:
             parser.add_argument(f"--{k}-tag", type=str, default="")
+        parser.add_argument(
+            "--mode",
+            choices=MODES,
+            default="table",
+            help="virtual only renders visible rows and loads pages while scrolling",
+        )
         parser.add_argument(
             "--write", help="Write to file insted of stdout", action="store_true"
         )
+        parser.add_argument(
+            "--force",
+            help="Write even if serializer and viewset did not change",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--jobs",
+            help="Generate components in N parallel processes",
+            type=int,
+            default=1,
+        )
+        add_profile_arguments(parser)
 
     def handle(self, *args, **options):
-        mod, cls = args[0].rsplit(".", 1)
-        mod = importlib.import_module(mod)
-        obj = getattr(mod, cls)
+        # stdout may be the component
+        with profiled(options, self.stderr):
+            self.generate(*args, **options)
+
+    def generate(self, *args, **options):
         kwargs = {
-            f"{k}_tag": options[f"{k}-tag"]
-            for k in TAG_PARAMS
-            if options.get(f"{k}-tag", "")
+            f"{k}_tag": options[f"{k}_tag"] for k in TAG_PARAMS if options[f"{k}_tag"]
         }
-        generator = ListGenerator(obj, **kwargs)
-        if options["write"]:
-            with open(generator.filename, "w") as f:
-                f.write(generator.render())
-        else:
-            print(generator.render())
+        generate_components(self, args, MODES[options["mode"]], options, **kwargs)
@@ -1,20 +1,30 @@
 import os
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.core import management
 from django.conf import settings
 
-from django_vue_generator.lists import ListGenerator
+from django_vue_generator.api import write_api
+from django_vue_generator.manifest import Manifest
+from django_vue_generator.process import recording, timing_report
+from django_vue_generator.profiling import add_profile_arguments, phase, profiled
+from django_vue_generator.project import (
+    frontend_packages,
+    render_all,
+    model_viewsets,
+    timing_summary,
+)
+from django_vue_generator.router import write_router
+from django_vue_generator.runtime import write_runtime
 from django_vue_generator.utils import (
     vuetify,
-    run,
     fail,
     cd_back,
     replace_in_file,
     overwrite,
     set_yarn_path,
+    Yarn,
 )
-from django_vue_generator.forms import VueForm
 
 ESLINT_CONFIG = """{
     "env": {
@@ -49,6 +59,15 @@ urlpatterns = [
 ]
 """
 
+VUE_CONFIG = """module.exports = {
+  chainWebpack: config => {
+    // router.js splits generated components into a chunk per model,
+    // don't prefetch them all on the first page load
+    config.plugins.delete('prefetch');
+  },
+};
+"""
+
 WEBPACK_CONFIG = """import webpack from 'webpack';
 
 // Try the environment variable, otherwise use static
@@ -67,33 +86,25 @@ export default {
   ],
 };"""
 
+# the vue cli and the beautifiers used by beautify.BeautifyWorker
+GLOBAL_PACKAGES = ["@vue/cli", "vue-beautify", "js-beautify"]
+
 
-def prepare(force=False, sudo=False):
+def prepare(force=False, sudo=False, offline=False, prefer_offline=False, mirror=None):
+    if mirror:
+        mirror = os.path.abspath(mirror)
     with cd_back():
-        if not run("which vue", True) and not run("which yarn", True):
-            fail(
-                "which npm", silent=True, msg="Please install yarn or at least npm"
-            )
-            print(
-                "Yarn not installed! Please install it first with your package-manager.\
-                Trying to install it via sudo npm i -g yarn"
-            )
-            fail("sudo npm i -g yarn")
-        if not run(r"yarn global list|grep vue\/cli", True):
-            if not sudo:
-                run("mkdir -p ~/.yarn-global")
-                run("yarn config set prefix ~/.yarn-global")
-            fail(f"{'sudo ' if sudo else ''}yarn global add @vue/cli")
-        if not run("yarn global list|grep vue-beautify", True):
-            if not sudo:
-                run("mkdir -p ~/.yarn-global")
-                run("yarn config set prefix ~/.yarn-global")
-            run(f"{'sudo ' if sudo else ''}yarn global add vue-beautify js-beautify")
+        yarn = Yarn(sudo, offline, prefer_offline)
+        # before vue create: its yarn install would share yarn's cache with
+        # this one, and yarn 1 doesn't lock the cache
+        yarn.add(*GLOBAL_PACKAGES, globally=True, fail_on_error=True)
         set_yarn_path()
         fail(f"vue create -m yarn -n -p default frontend{' -f' if force else ''}")
     with cd_back("frontend/"):
-        run("yarn add vuelidate")
-        run("yarn add vue-resource")
+        if mirror:
+            yarn.offline_mirror(mirror)
+        # one resolution of the dependency tree for everything generated code needs
+        yarn.add(*frontend_packages(), fail_on_error=True)
         replace_in_file(
             "src/main.js",
             "import Vue from 'vue'",
@@ -104,16 +115,25 @@ def prepare(force=False, sudo=False):
             "import Vue from 'vue'",
             """\nimport VueResource from 'vue-resource'\nVue.use(VueResource)\n""",
         )
+        replace_in_file(
+            "src/main.js",
+            "import Vue from 'vue'",
+            """\nimport router from './router'\n""",
+        )
+        replace_in_file("src/main.js", "new Vue({", "\n  router,")
+        replace_in_file("src/App.vue", '<div id="app">', "\n    <router-view/>")
         replace_in_file(
             "package.json",
             "vue-cli-service build",
             r""" && (rm -rf static/frontend/ 2>/dev/null || true) && sed 's/=\\//=\\/static\\/frontend\\//g' dist/index.html > templates/frontend/index.html && mv dist static/frontend""",
         )
-        run("touch __init__.py")
-        run("mkdir -p templates/frontend")
-        run("mkdir -p static/frontend")
+        open("__init__.py", "a").close()
+        os.makedirs("templates/frontend", exist_ok=True)
+        os.makedirs("static/frontend", exist_ok=True)
         with overwrite(".eslintrc.json", force) as f:
             f.write(ESLINT_CONFIG)
+        with overwrite("vue.config.js", force) as f:
+            f.write(VUE_CONFIG)
         # with overwrite('webpack.config.js', force) as f:
         #     f.write(WEBPACK_CONFIG)
         with overwrite("templates/index.html", force) as f:
@@ -127,23 +147,6 @@ def prepare(force=False, sudo=False):
     print("or 'cd frontend && yarn build && cd .. && ./manage.py collectstatic'")
 
 
-# def apis():
-#     yield ''
-#     from django.urls import get_resolver
-#     for func, url in get_resolver().reverse_dict.items():
-#         try:
-#             func = func
-#             url = url[0][0][0]
-#             for method, action in getattr(func, 'actions', {}).items():
-#                 params = func.cls.lookup_field if action == 'retrieve' else 'params'
-#
-#                 yield f"""{func.initkwargs['basename']}_{action}: ({params}) => {{
-#                     this.$http.{method}('{url}').then(r => {{
-#                        alert(r)
-#                     }},
-#                     """
-#         except:
-#             pass
 class Command(BaseCommand):
     help = "Generate vue frontend"
 
@@ -155,14 +158,71 @@ class Command(BaseCommand):
             Otherwise it would try to install them into ~/.yarn-global/",
             action="store_true",
         )
+        parser.add_argument(
+            "--offline",
+            help="Install packages only from yarn's cache or the offline mirror",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--prefer-offline",
+            help="Only download packages missing from yarn's cache",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--offline-mirror",
+            help="Keep package tarballs in this directory for later --offline installs",
+        )
+        parser.add_argument(
+            "--jobs",
+            help="Generate components in N parallel processes",
+            type=int,
+            default=1,
+        )
+        add_profile_arguments(parser)
 
     def handle(self, *args, **options):
-        prepare(options["force"], options["sudo"])
-        from rest_framework.viewsets import ModelViewSet
-
-        for viewset in ModelViewSet.__subclasses__():
-            name = viewset().get_serializer_class().Meta.model._meta.model_name.title()
-            for GeneratorClass in [VueForm, ListGenerator]:
-                generator = GeneratorClass(viewset)
-                with overwrite(generator.filename) as f:
-                    f.write(generator.render())
+        with profiled(options, self.stdout):
+            self.generate(**options)
+
+    def generate(self, **options):
+        with phase("prepare"), recording() as timings:
+            prepare(
+                options["force"],
+                options["sudo"],
+                options["offline"],
+                options["prefer_offline"],
+                options["offline_mirror"],
+            )
+        with phase("write"):
+            write_runtime()
+            manifest = Manifest()
+            write_api(manifest, options["force"])
+        results = render_all(
+            model_viewsets(),
+            jobs=options["jobs"],
+            manifest=None if options["force"] else manifest,
+        )
+        with phase("write"):
+            for result in results:
+                if result.content is not None:
+                    with overwrite(result.filename) as f:
+                        f.write(result.content)
+                    # answering N to the overwrite prompt writes to devnull
+                    if f.name != os.devnull:
+                        manifest.update(result.filename, result.fingerprint)
+            write_router(
+                manifest,
+                [(r.generator, r.filename) for r in results if not r.error],
+                options["force"],
+            )
+            manifest.save()
+        for line in timing_summary(results):
+            self.stdout.write(line)
+        self.stdout.write("External commands:")
+        for line in timing_report(timings):
+            self.stdout.write(line)
+        failed = [result for result in results if result.error]
+        for result in failed:
+            self.stderr.write(f"{result.target} ({result.generator}):\n{result.error}")
+        if failed:
+            raise CommandError(f"Failed to generate {len(failed)} component(s)")
@@ -0,0 +1,53 @@
+import os
+import socket
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from django_vue_generator.client import SOCKET_PATH
+from django_vue_generator.resolver import get_index
+from django_vue_generator.server import Server
+from django_vue_generator.utils import vuetify
+
+
+class Command(BaseCommand):
+    help = """Keep Django and the generators loaded and serve render requests on a
+    unix socket, see python -m django_vue_generator.client"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=SOCKET_PATH)
+        parser.add_argument(
+            "--root",
+            help="Reload modules under this directory when they change, "
+            "defaults to BASE_DIR",
+        )
+
+    def handle(self, *args, **options):
+        path = options["socket"]
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                # left behind by a server that didn't shut down
+                os.unlink(path)
+            else:
+                raise CommandError(f"A server is already listening on {path}")
+            finally:
+                probe.close()
+        root = options["root"] or getattr(settings, "BASE_DIR", os.getcwd())
+        # pay for the url index and the beautifier process before the first request
+        get_index()
+        vuetify("<template>\n<div></div>\n</template>\n")
+        server = Server(path, root, self.stdout.write)
+        self.stdout.write(f"Listening on {path}")
+        try:
+            while not server.restart:
+                server.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        if server.restart:
+            os.execv(sys.executable, [sys.executable] + sys.argv)
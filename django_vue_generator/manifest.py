@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+
+from django.utils.functional import Promise
+from rest_framework import serializers
+
+from django_vue_generator import __version__
+from django_vue_generator.utils import atomic_write
+
+MANIFEST_PATH = "frontend/.vuegen-manifest.json"
+
+_generator_hash = {}
+
+
+def stable(value):
+    """Json-serializable value without memory addresses or database queries."""
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, Promise):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return [stable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): stable(v) for k, v in value.items()}
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    return stable(type(value))
+
+
+def field_inputs(field):
+    inputs = {
+        "class": stable(type(field)),
+        "label": stable(field.label),
+        "source": field.source,
+        "required": field.required,
+        "read_only": field.read_only,
+        "allow_null": field.allow_null,
+        "error_messages": stable(field.error_messages),
+        "validators": [
+            {"class": stable(type(v)), **stable(vars(v))} for v in field.validators
+        ],
+    }
+    for k in ["min", "max"]:
+        for f in ["length", "value"]:
+            inputs[f"{k}_{f}"] = stable(getattr(field, f"{k}_{f}", None))
+    # RelatedField.choices would query the whole table
+    if isinstance(field, serializers.ChoiceField):
+        inputs["choices"] = stable(list(field.choices.items()))
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, serializers.Serializer):
+        inputs["fields"] = {
+            name: field_inputs(child) for name, child in field.fields.items()
+        }
+    return inputs
+
+
+def generator_hash():
+    """
+    Hash of the source of the generator modules, so that changes to the
+    generated code invalidate fingerprints without bumping __version__.
+    Computed once, vuegen_server restarts when these modules change.
+    """
+    if not _generator_hash:
+        package = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(package)):
+            if name.endswith(".py") and name != "tests.py":
+                with open(os.path.join(package, name), "rb") as f:
+                    digest.update(f"{name}:".encode() + f.read())
+        _generator_hash["source"] = digest.hexdigest()
+    return _generator_hash["source"]
+
+
+def fingerprint(generator):
+    inputs = generator.inputs()
+    if inputs is None:
+        return None
+    inputs["version"] = __version__
+    inputs["generator_source"] = generator_hash()
+    return hashlib.sha256(
+        json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class Manifest:
+    """
+    Fingerprints of generated components, so unchanged ones are not rendered
+    and rewritten (which would trigger a rebuild of the whole frontend).
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.components = json.load(f).get("components", {})
+        except (OSError, ValueError):
+            self.components = {}
+
+    def changed(self, filename, fingerprint):
+        return (
+            fingerprint is None
+            or self.components.get(filename) != fingerprint
+            or not os.path.exists(filename)
+        )
+
+    def update(self, filename, fingerprint):
+        if fingerprint is not None:
+            self.components[filename] = fingerprint
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(
+                {"version": __version__, "components": self.components},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+
+
+def write_generated(generator, manifest, force=False):
+    """
+    Writes generator.filename unless its inputs are unchanged since manifest
+    was saved. Returns whether it was written, saving manifest is up to the
+    caller.
+    """
+    digest = fingerprint(generator)
+    if not force and not manifest.changed(generator.filename, digest):
+        return False
+    with atomic_write(generator.filename) as f:
+        generator.render_to(f)
+    manifest.update(generator.filename, digest)
+    return True
@@ -0,0 +1,85 @@
+from rest_framework import pagination
+from rest_framework.settings import api_settings
+
+from django_vue_generator.queries import list_plan
+
+# query parameter with comma separated names of fields to return
+FIELDS_PARAM = "fields"
+
+# page size of DefaultPaginationMixin and generated limit/offset lists
+# when PAGE_SIZE isn't set
+DEFAULT_LIMIT = 100
+
+
+def requested_fields(request):
+    """Field names requested with FIELDS_PARAM, None if all fields are."""
+    value = request and request.query_params.get(FIELDS_PARAM)
+    if not value:
+        return None
+    return frozenset(name.strip() for name in value.split(",") if name.strip())
+
+
+class FieldsProjectionMixin:
+    """
+    Serializer mixin which only returns the fields named in the "fields" query
+    parameter, which generated lists send when given the "fields" prop.
+    Unknown names are ignored, all fields are returned if none is known.
+
+    class BookSerializer(FieldsProjectionMixin, serializers.ModelSerializer):
+        ...
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = requested_fields(self.context.get("request"))
+        if requested and requested & set(fields):
+            for name in set(fields) - requested:
+                fields.pop(name)
+        return fields
+
+
+class ListQueryMixin:
+    """
+    Viewset mixin which joins and prefetches everything the list serializer
+    renders and loads only the columns it needs, avoiding a query per row.
+    With FieldsProjectionMixin on the serializer, only the columns of the
+    requested fields are loaded.
+
+    class BookViewSet(ListQueryMixin, viewsets.ModelViewSet):
+        ...
+
+    ./manage.py check_list_queries app.views.BookViewSet shows the queryset
+    calls and how many queries a list page takes with and without it.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, "action", None) == "list":
+            serializer_class = self.get_serializer_class()
+            fields = None
+            if issubclass(serializer_class, FieldsProjectionMixin):
+                fields = requested_fields(getattr(self, "request", None))
+            queryset = list_plan(serializer_class, fields).apply(queryset)
+        return queryset
+
+
+class DefaultLimitOffsetPagination(pagination.LimitOffsetPagination):
+    """Limits requests without a limit parameter too."""
+
+    default_limit = api_settings.PAGE_SIZE or DEFAULT_LIMIT
+
+
+class DefaultPaginationMixin:
+    """
+    Viewset mixin which paginates with limit and offset unless the viewset has
+    a pagination_class, so that lists generated for it never load the whole
+    table.
+
+    class PublisherViewSet(DefaultPaginationMixin, viewsets.ModelViewSet):
+        ...
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if getattr(cls, "pagination_class", None) is None:
+            cls.pagination_class = DefaultLimitOffsetPagination
@@ -0,0 +1,134 @@
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+Timing = namedtuple("Timing", ["cmd", "seconds", "returncode"])
+
+# seconds to wait for the rest of a command's output after it exited or was
+# killed, a process it started in the background may keep the pipe open
+OUTPUT_GRACE = 5
+
+# lists of the recording() blocks being run
+_recordings = []
+_output_lock = threading.Lock()
+
+
+@contextmanager
+def recording():
+    """Collects a Timing of every command run in the block into the yielded list."""
+    timings = []
+    _recordings.append(timings)
+    try:
+        yield timings
+    finally:
+        _recordings.remove(timings)
+
+
+def split(cmd):
+    """Arguments of cmd, a list or a string split like a shell would, with ~ expanded."""
+    if isinstance(cmd, str):
+        cmd = shlex.split(cmd)
+    return [os.path.expanduser(arg) if arg.startswith("~") else arg for arg in cmd]
+
+
+def _stream(pipe, prefix, out):
+    for line in pipe:
+        # whole lines, so output of concurrent commands doesn't interleave
+        with _output_lock:
+            out.write(f"{prefix}{line}")
+            out.flush()
+
+
+def _kill(process):
+    """Kills process and everything it started, see start_new_session in execute."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, OSError):
+        process.kill()
+    process.wait()
+
+
+def execute(cmd, silent=False, timeout=None, prefix="", out=None):
+    """
+    Runs cmd without a shell and returns its exit code. Output is streamed to
+    out (stdout) line by line as it comes unless silent. Commands running
+    longer than timeout seconds are killed along with their children and
+    return -9. Missing executables return 127 like in a shell.
+    """
+    args = split(cmd)
+    out = out or sys.stdout
+    start = time.perf_counter()
+    try:
+        process = subprocess.Popen(
+            args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL if silent else subprocess.PIPE,
+            stderr=subprocess.DEVNULL if silent else subprocess.STDOUT,
+            universal_newlines=True,
+            # a process group to kill on timeout, yarn and node start children.
+            # Without a timeout commands keep the terminal, e.g. for sudo
+            start_new_session=timeout is not None,
+        )
+    except OSError:
+        returncode = 127
+    else:
+        reader = None
+        if not silent:
+            reader = threading.Thread(
+                target=_stream, args=(process.stdout, prefix, out), daemon=True
+            )
+            reader.start()
+        try:
+            returncode = process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            _kill(process)
+            returncode = -9
+        except BaseException:
+            # ctrl-c doesn't reach a command in its own session
+            if timeout is not None:
+                _kill(process)
+            raise
+        if reader is not None:
+            reader.join(OUTPUT_GRACE)
+    timing = Timing(
+        " ".join(map(shlex.quote, args)), time.perf_counter() - start, returncode
+    )
+    for timings in list(_recordings):
+        timings.append(timing)
+    return returncode
+
+
+def run_parallel(cmds, silent=False, timeout=None, jobs=None):
+    """
+    Runs independent commands concurrently, their output lines prefixed with
+    the program name. Returns exit codes in the order of cmds.
+    """
+    cmds = list(cmds)
+    with ThreadPoolExecutor(jobs or len(cmds) or 1) as pool:
+        return list(
+            pool.map(
+                lambda cmd: execute(
+                    cmd,
+                    silent,
+                    timeout,
+                    prefix=f"[{split(cmd)[0]}] " if len(cmds) > 1 else "",
+                ),
+                cmds,
+            )
+        )
+
+
+def timing_report(timings):
+    """Lines with the duration of every command, slowest first."""
+    for timing in sorted(timings, key=lambda t: -t.seconds):
+        status = "" if timing.returncode == 0 else f"  (exit {timing.returncode})"
+        yield f"{timing.seconds:8.2f}s  {timing.cmd}{status}"
+    if timings:
+        yield f"{sum(t.seconds for t in timings):8.2f}s  total"
@@ -0,0 +1,193 @@
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager, nullcontext
+
+# Profiler collecting phases, None unless a command runs with --profile
+_active = None
+_null = nullcontext()
+
+
+def process_age():
+    """Wall seconds since the process started, None where /proc isn't there."""
+    try:
+        with open("/proc/self/stat") as f:
+            # starttime in clock ticks after boot, the 22nd field
+            ticks = int(f.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def phase(name):
+    """
+    Context manager attributing time, memory and database queries to phase
+    name while a profiler is active, does nothing otherwise.
+    """
+    if _active is None:
+        return _null
+    return _active.phase(name)
+
+
+class Profiler:
+    """
+    Exclusive time, traced memory growth and database queries of named
+    phases. Time spent in a nested phase only counts towards the inner one,
+    the rest of the run is reported as "other".
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+        self.stack = []
+        # before profiling started: interpreter, Django and app imports
+        self.startup = time.process_time()
+        self.startup_seconds = process_age()
+        self.start = self.seconds = None
+        self.peak = 0
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def phase(self, name):
+        start = (
+            time.perf_counter(),
+            tracemalloc.get_traced_memory()[0],
+            self.queries,
+        )
+        self.stack.append([0.0, 0, 0])
+        try:
+            yield
+        finally:
+            children = self.stack.pop()
+            total = [
+                time.perf_counter() - start[0],
+                tracemalloc.get_traced_memory()[0] - start[1],
+                self.queries - start[2],
+            ]
+            stats = self.phases.setdefault(
+                name, {"calls": 0, "seconds": 0.0, "memory_bytes": 0, "queries": 0}
+            )
+            stats["calls"] += 1
+            for key, value, child in zip(
+                ["seconds", "memory_bytes", "queries"], total, children
+            ):
+                stats[key] += value - child
+            if self.stack:
+                for i, value in enumerate(total):
+                    self.stack[-1][i] += value
+
+    @contextmanager
+    def running(self):
+        """Makes this the active profiler and tracks every database connection."""
+        from django.db import connections
+
+        global _active
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self.count_query))
+            tracemalloc.start()
+            _active = self
+            self.start = time.perf_counter()
+            try:
+                yield self
+            finally:
+                self.seconds = time.perf_counter() - self.start
+                self.peak = tracemalloc.get_traced_memory()[1]
+                _active = None
+                tracemalloc.stop()
+
+    def as_dict(self):
+        phases = dict(self.phases)
+        phases["other"] = {
+            "calls": 1,
+            "seconds": self.seconds - sum(p["seconds"] for p in self.phases.values()),
+            "memory_bytes": None,
+            "queries": self.queries - sum(p["queries"] for p in self.phases.values()),
+        }
+        return {
+            "startup_seconds": self.startup_seconds,
+            "startup_cpu_seconds": self.startup,
+            "seconds": self.seconds,
+            "peak_memory_bytes": self.peak,
+            "queries": self.queries,
+            "phases": phases,
+        }
+
+    def report(self):
+        data = self.as_dict()
+        yield (
+            f"{'phase':<12}{'calls':>7}{'time':>12}{'share':>8}"
+            f"{'memory':>14}{'queries':>9}"
+        )
+        for name, p in sorted(data["phases"].items(), key=lambda i: -i[1]["seconds"]):
+            memory = (
+                ""
+                if p["memory_bytes"] is None
+                else f"{p['memory_bytes'] / 1024:.1f} KiB"
+            )
+            share = p["seconds"] / data["seconds"] if data["seconds"] else 0
+            yield (
+                f"{name:<12}{p['calls']:>7}{p['seconds'] * 1000:>9.1f} ms{share:>8.1%}"
+                f"{memory:>14}{p['queries']:>9}"
+            )
+        yield (
+            f"total {data['seconds']:.3f}s, {data['queries']} queries, "
+            f"peak {data['peak_memory_bytes'] / 1024:.1f} KiB traced"
+        )
+        startup = f"{data['startup_cpu_seconds']:.3f}s cpu"
+        if data["startup_seconds"] is not None:
+            startup = f"{data['startup_seconds']:.3f}s ({startup})"
+        yield f"{startup} before the command ran: interpreter, Django and app imports"
+
+
+def add_profile_arguments(parser):
+    parser.add_argument(
+        "--profile",
+        help="Report time, memory and database queries of each phase",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile-json", help="Also write the phase report as json to this file"
+    )
+    parser.add_argument(
+        "--profile-stats",
+        help="Also write cProfile stats of the whole run to this file, see pstats",
+    )
+
+
+@contextmanager
+def profiled(options, stdout):
+    """
+    Profiles the block if options ask for any kind of profile. Phases run
+    in --jobs worker processes are not seen.
+    """
+    if not (options["profile"] or options["profile_json"] or options["profile_stats"]):
+        yield None
+        return
+    profiler = Profiler()
+    stats = cProfile.Profile() if options["profile_stats"] else None
+    try:
+        with profiler.running():
+            if stats is not None:
+                stats.enable()
+            try:
+                yield profiler
+            finally:
+                if stats is not None:
+                    stats.disable()
+    finally:
+        if stats is not None:
+            stats.dump_stats(options["profile_stats"])
+        if options["profile"]:
+            for line in profiler.report():
+                stdout.write(line)
+        if options["profile_json"]:
+            with open(options["profile_json"], "w") as f:
+                json.dump(profiler.as_dict(), f, indent=2)
@@ -0,0 +1,278 @@
+import importlib
+import multiprocessing
+import time
+import traceback
+from collections import namedtuple
+from fnmatch import fnmatchcase
+
+import django
+from django.core.management.base import CommandError
+from django.db import connections
+from rest_framework import serializers
+from rest_framework.generics import GenericAPIView
+
+from django_vue_generator.api import ApiGenerator, write_api
+from django_vue_generator.forms import VueForm
+from django_vue_generator.lists import ListGenerator, VirtualListGenerator
+from django_vue_generator.manifest import Manifest, fingerprint
+from django_vue_generator.profiling import phase
+from django_vue_generator.resolver import get_index
+from django_vue_generator.runtime import write_runtime
+from django_vue_generator.utils import atomic_write
+
+GENERATORS = {"form": VueForm, "list": ListGenerator, "virtual": VirtualListGenerator}
+# classes each generator takes as target
+TARGET_TYPES = {
+    "form": (GenericAPIView, serializers.BaseSerializer),
+    "list": (GenericAPIView,),
+    "virtual": (GenericAPIView,),
+}
+
+# content is None unless rendered to a string, written is whether the
+# rendering process wrote filename itself
+Result = namedtuple(
+    "Result",
+    [
+        "target",
+        "generator",
+        "filename",
+        "content",
+        "elapsed",
+        "error",
+        "fingerprint",
+        "written",
+    ],
+)
+
+
+def dotted_path(obj):
+    return f"{obj.__module__}.{obj.__qualname__}"
+
+
+def import_object(path):
+    mod, cls = path.rsplit(".", 1)
+    return getattr(importlib.import_module(mod), cls)
+
+
+def accepts(generator):
+    return lambda obj: issubclass(obj, TARGET_TYPES[generator])
+
+
+def resolve_targets(patterns, accept=lambda obj: True):
+    """
+    Dotted paths of the classes given by dotted paths or by patterns with
+    shell-style wildcards in the class name like app.views.*ViewSet, sorted
+    and without duplicates. Wildcards only match classes for which
+    accept(cls) is true and whose __module__ is the module or a submodule,
+    so imported classes are skipped. Classes made by factory functions have
+    the factory's __module__ and have to be given by path.
+    """
+    targets = {}
+    for pattern in patterns:
+        module, name = pattern.rsplit(".", 1)
+        if not any(c in name for c in "*?["):
+            targets.setdefault(import_object(pattern), pattern)
+            continue
+        matches = [
+            (obj, f"{module}.{attr}")
+            for attr, obj in vars(importlib.import_module(module)).items()
+            if isinstance(obj, type)
+            and fnmatchcase(attr, name)
+            and (obj.__module__ == module or obj.__module__.startswith(f"{module}."))
+            and accept(obj)
+        ]
+        if not matches:
+            raise ValueError(f"Nothing matches {pattern}")
+        for obj, path in matches:
+            targets.setdefault(obj, path)
+    return sorted(targets.values())
+
+
+def model_viewsets():
+    from rest_framework.viewsets import ModelViewSet
+
+    # importing the URLconf imports the viewsets
+    get_index()
+    return sorted(ModelViewSet.__subclasses__(), key=dotted_path)
+
+
+def frontend_packages(generators=("form", "list")):
+    """npm packages the generated frontend imports, sorted."""
+    # router imports GENERATORS from here
+    from django_vue_generator.router import RouterGenerator
+
+    classes = [ApiGenerator, RouterGenerator, *(GENERATORS[g] for g in generators)]
+    return sorted({package for cls in classes for package in cls.packages})
+
+
+def render(task):
+    """
+    Renders one component to a string, or streams it to its file if write.
+    Nothing is rendered if the component's fingerprint matches the one
+    recorded in manifest.
+    """
+    generator_name, target, kwargs, manifest, write = task
+    path = target if isinstance(target, str) else dotted_path(target)
+    start = time.perf_counter()
+    try:
+        if isinstance(target, str):
+            # classes made by factories can't be pickled, workers import them
+            target = import_object(target)
+        generator = GENERATORS[generator_name](target, **kwargs)
+        digest = fingerprint(generator)
+        content = None
+        written = False
+        if manifest and not manifest.changed(generator.filename, digest):
+            pass
+        elif write:
+            with phase("write"), atomic_write(generator.filename) as f:
+                generator.render_to(f)
+            written = True
+        else:
+            content = generator.render()
+    except Exception:
+        return Result(
+            path,
+            generator_name,
+            None,
+            None,
+            time.perf_counter() - start,
+            traceback.format_exc(),
+            None,
+            False,
+        )
+    return Result(
+        path,
+        generator_name,
+        generator.filename,
+        content,
+        time.perf_counter() - start,
+        None,
+        digest,
+        written,
+    )
+
+
+def init_worker():
+    # no-op for forked workers, spawned ones have to load apps themselves
+    django.setup()
+
+
+def render_all(
+    targets, generators=("form", "list"), jobs=1, manifest=None, write=False, **kwargs
+):
+    """
+    Renders every generator for every target, in a process pool if jobs > 1.
+    Results are ordered by target and generator regardless of which worker
+    finished first. Exceptions are returned in Result.error instead of raised.
+    Components unchanged since the manifest was saved are not rendered.
+    With write, components are written by the process rendering them instead
+    of being sent back as strings.
+    """
+    tasks = [
+        (name, target, kwargs, manifest, write)
+        for target in targets
+        for name in generators
+    ]
+    if jobs > 1 and len(tasks) > 1:
+        # forked workers must not share the parent's database connections
+        connections.close_all()
+        with multiprocessing.Pool(
+            min(jobs, len(tasks)), initializer=init_worker
+        ) as pool:
+            results = pool.map(render, tasks)
+    else:
+        results = list(map(render, tasks))
+    return sorted(results, key=lambda r: (r.target, r.generator))
+
+
+def write_components(targets, generator, force=False, jobs=1, **kwargs):
+    """
+    Renders generator's component for every target and writes the changed
+    ones, along with the runtime and api.js they import. Returns the results.
+    """
+    with phase("write"):
+        write_runtime()
+        manifest = Manifest()
+        write_api(manifest, force)
+    results = render_all(
+        targets, (generator,), jobs, None if force else manifest, True, **kwargs
+    )
+    with phase("write"):
+        for result in results:
+            if result.written:
+                manifest.update(result.filename, result.fingerprint)
+        manifest.save()
+    return results
+
+
+def write_summary(results):
+    counts = {"written": 0, "up to date": 0, "failed": 0}
+    for result in results:
+        if result.error:
+            counts["failed"] += 1
+        elif result.written:
+            counts["written"] += 1
+            yield f"Wrote {result.filename}"
+        else:
+            counts["up to date"] += 1
+            yield f"{result.filename} is up to date"
+    yield ", ".join(f"{n} {state}" for state, n in counts.items())
+
+
+def status(result):
+    if result.error:
+        return "failed"
+    if result.content is None and not result.written:
+        return "skipped"
+    return f"{result.elapsed:.3f}s"
+
+
+def timing_summary(results, generators=("form", "list")):
+    width = max([len("target")] + [len(r.target) for r in results])
+    yield "  ".join(
+        [f"{'target':<{width}}", *(f"{g:>8}" for g in generators), f"{'total':>8}"]
+    )
+    by_target = {}
+    for result in results:
+        by_target.setdefault(result.target, {})[result.generator] = result
+    for target, row in by_target.items():
+        cells = [
+            (f"{status(row[g]):>8}" if g in row else f"{'-':>8}") for g in generators
+        ]
+        total = sum(r.elapsed for r in row.values())
+        yield "  ".join([f"{target:<{width}}", *cells, f"{total:.3f}s".rjust(8)])
+
+
+def generate_components(command, patterns, generator, options, **kwargs):
+    """
+    generate_vue_form and generate_vue_list: renders the component of a single
+    target to the command's stdout, or with --write writes the components of
+    all targets and reports on them. Raises CommandError for bad patterns and
+    failed components.
+    """
+    with phase("targets"):
+        try:
+            targets = resolve_targets(patterns, accepts(generator))
+        except (ImportError, AttributeError, ValueError) as e:
+            raise CommandError(e)
+    if not options["write"]:
+        if len(targets) > 1:
+            raise CommandError(f"{len(targets)} components need --write")
+        component = GENERATORS[generator](import_object(targets[0]), **kwargs)
+        with phase("write"):
+            component.render_to(command.stdout)
+        return
+    results = write_components(
+        targets, generator, options["force"], options["jobs"], **kwargs
+    )
+    for line in write_summary(results):
+        command.stdout.write(line)
+    if options["verbosity"] > 1:
+        for line in timing_summary(results, (generator,)):
+            command.stdout.write(line)
+    failed = [result for result in results if result.error]
+    for result in failed:
+        command.stderr.write(f"{result.target}:\n{result.error}")
+    if failed:
+        raise CommandError(f"Failed to generate {len(failed)} component(s)")
@@ -0,0 +1,152 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import relations
+
+from django_vue_generator.fields import describe
+
+# relations which serialize to the related object's pk, no join needed
+PK_RELATIONS = (relations.PrimaryKeyRelatedField, relations.HyperlinkedRelatedField)
+
+
+class QueryPlan:
+    """
+    select_related/prefetch_related/only() calls a queryset of model needs to
+    serialize some fields without a query per row.
+    only is None when some field needs the whole object (a property, a method,
+    __str__ etc.) so columns can't be restricted.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.select_related = []
+        self.prefetch_related = []
+        self.only = {model._meta.pk.name}
+
+    def select(self, *names):
+        self.select_related.extend(
+            name for name in names if name not in self.select_related
+        )
+
+    def restrict(self, *names):
+        if self.only is not None:
+            self.only.update(names)
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.only is not None:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+    def code(self, queryset=None):
+        code = queryset or f"{self.model.__name__}.objects.all()"
+        if self.select_related:
+            code += f".select_related({', '.join(map(repr, self.select_related))})"
+        if self.prefetch_related:
+            prefetches = ", ".join(
+                f"Prefetch({prefetch.prefetch_through!r}, queryset={prefetch.plan.code()})"
+                for prefetch in self.prefetch_related
+            )
+            code += f".prefetch_related({prefetches})"
+        if self.only is not None:
+            code += f".only({', '.join(map(repr, sorted(self.only)))})"
+        return code
+
+    def __str__(self):
+        return self.code()
+
+
+class PlannedPrefetch(Prefetch):
+    def __init__(self, lookup, plan):
+        self.plan = plan
+        super().__init__(lookup, queryset=plan.apply(plan.model._default_manager.all()))
+
+
+def nested_plan(model, field):
+    """Plan for the related model reached through field."""
+    if field.children is not None:
+        return plan_fields(model, field.children)
+    plan = QueryPlan(model)
+    if field.relation is None or not issubclass(field.relation, PK_RELATIONS):
+        if field.slug_field:
+            plan.restrict(field.slug_field)
+        else:
+            # StringRelatedField and friends may use any attribute
+            plan.only = None
+    return plan
+
+
+def plan_fields(model, fields):
+    plan = QueryPlan(model)
+    for field in fields:
+        if field.source == "*":
+            plan.only = None
+            continue
+        name, *rest = field.source.split(".")
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # property or method, anything can be accessed
+            plan.only = None
+            continue
+        if not model_field.is_relation:
+            plan.restrict(name)
+            continue
+        related_model = model_field.related_model
+        if rest:
+            # dotted source like "publisher.name"
+            inner = QueryPlan(related_model)
+            inner.only = None
+        else:
+            inner = nested_plan(related_model, field)
+        if model_field.many_to_many or model_field.one_to_many:
+            if model_field.one_to_many:
+                # prefetched rows are attached to parents through this column
+                inner.restrict(model_field.field.name)
+            plan.prefetch_related.append(PlannedPrefetch(name, inner))
+            continue
+        if model_field.concrete:
+            plan.restrict(name)
+        if (
+            rest
+            or field.children is not None
+            or not (field.relation and issubclass(field.relation, PK_RELATIONS))
+        ):
+            plan.select(name, *(f"{name}__{s}" for s in inner.select_related))
+            plan.prefetch_related.extend(
+                PlannedPrefetch(f"{name}__{p.prefetch_through}", p.plan)
+                for p in inner.prefetch_related
+            )
+            if inner.only is None:
+                inner.only = {f.name for f in related_model._meta.concrete_fields}
+            plan.restrict(*(f"{name}__{f}" for f in inner.only))
+    return plan
+
+
+_cache = {}
+# combinations of known names are still many on wide serializers
+MAX_PLANS = 256
+
+
+def list_plan(serializer_class, fields=None):
+    """
+    QueryPlan for listing serializer_class, or only the given names of its
+    fields. Built once per process for each combination of known names,
+    fields comes from the query string and unknown names mustn't add entries.
+    """
+    described = describe(serializer_class)
+    # like FieldsProjectionMixin, all fields if none of them is known
+    selected = [field for field in described if field.name in (fields or ())]
+    key = serializer_class, frozenset(field.name for field in selected)
+    if key not in _cache:
+        if len(_cache) >= MAX_PLANS:
+            # oldest first
+            del _cache[next(iter(_cache))]
+        _cache[key] = plan_fields(serializer_class.Meta.model, selected or described)
+    return _cache[key]
+
+
+def clear():
+    _cache.clear()
@@ -0,0 +1,77 @@
+from collections import namedtuple
+
+from django.urls import get_resolver, get_urlconf
+from django.utils.translation import get_language
+
+from django_vue_generator.profiling import phase
+
+ViewsetUrls = namedtuple(
+    "ViewsetUrls", ["list_url", "retrieve_url", "basename"], defaults=[None] * 3
+)
+
+_index = {}
+
+
+def build_index(resolver):
+    index = {}
+    for callback, url in resolver.reverse_dict.items():
+        viewset = getattr(callback, "cls", None)
+        actions = getattr(callback, "actions", {}).values()
+        if viewset is None:
+            continue
+        list_url, retrieve_url, basename = index.get(viewset, ViewsetUrls())
+        basename = basename or getattr(callback, "initkwargs", {}).get("basename")
+        if not list_url and "create" in actions:
+            list_url = url[0][0][0]
+        if not retrieve_url and "update" in actions:
+            retrieve_url = url[0][0][0].rsplit("/", 2)[0]
+        index[viewset] = ViewsetUrls(list_url, retrieve_url, basename)
+    return index
+
+
+def build_model_index(index):
+    models = {}
+    for viewset, urls in index.items():
+        model = getattr(getattr(viewset, "queryset", None), "model", None)
+        if model is not None and urls.list_url and model not in models:
+            models[model] = viewset
+    return models
+
+
+def get_indexes():
+    resolver = get_resolver(get_urlconf())
+    key = (resolver, get_language())
+    if key not in _index:
+        with phase("resolver"):
+            _index.clear()
+            index = build_index(resolver)
+            # the dict is for values derived from the index, see index_cache
+            _index[key] = index, build_model_index(index), {}
+    return _index[key]
+
+
+def get_index():
+    """
+    Maps viewset class to its list/detail urls and router basename.
+    Built once per resolver: clear_url_caches() (e.g. on ROOT_URLCONF change)
+    creates a new resolver which invalidates the index.
+    """
+    return get_indexes()[0]
+
+
+def index_cache():
+    """Dict for values computed from the index, emptied when it is rebuilt."""
+    return get_indexes()[2]
+
+
+def viewset_urls(viewset):
+    return get_index().get(viewset, ViewsetUrls())
+
+
+def model_viewset(model):
+    """First routed viewset with a list url whose queryset is of model."""
+    return get_indexes()[1].get(model)
+
+
+def clear():
+    _index.clear()
@@ -0,0 +1,64 @@
+import json
+import os
+
+from django_vue_generator.manifest import stable, write_generated
+from django_vue_generator.project import GENERATORS
+from django_vue_generator.vue import JsModule
+
+ROUTER_PATH = "frontend/src/router.js"
+
+ROUTER_JS = """// Generated by django_vue_generator, changes will be overwritten.
+import Vue from 'vue';
+import VueRouter from 'vue-router';
+
+Vue.use(VueRouter);
+
+"""
+
+# (path postfix, name postfix, extra route options) of each generator's routes
+ROUTES = {
+    "list": [("", "list", {})],
+    "form": [("/new", "new", {}), ("/:pk", "edit", {"props": True})],
+}
+ROUTES["virtual"] = ROUTES["list"]
+
+
+class RouterGenerator(JsModule):
+    """
+    frontend/src/router.js with routes to generated components. Components are
+    imported with import() into one chunk per model, so a model's components
+    are only downloaded when one of its routes is visited.
+    """
+
+    filename = ROUTER_PATH
+    packages = ["vue-router"]
+
+    def __init__(self, components):
+        """components are (generator name, component filename) pairs."""
+        self.routes = []
+        for generator, filename in sorted(components):
+            component = os.path.splitext(os.path.basename(filename))[0]
+            model = component[: -len(GENERATORS[generator].postfix)].lower()
+            for path, name, options in ROUTES[generator]:
+                self.routes.append(
+                    (f"/{model}{path}", f"{model}-{name}", model, component, options)
+                )
+
+    def inputs(self):
+        return {"generator": stable(type(self)), "routes": self.routes}
+
+    def source(self):
+        yield ROUTER_JS
+        yield "export const routes = ["
+        for i, (path, name, chunk, component, options) in enumerate(self.routes):
+            extra = "".join(f", {k}: {json.dumps(v)}" for k, v in options.items())
+            yield (
+                f"{',' if i else ''}{{path: '{path}', name: '{name}', component: () => "
+                f'import(/* webpackChunkName: "{chunk}" */ '
+                f"'./components/{component}.vue'){extra}}}"
+            )
+        yield "];\n\nexport default new VueRouter({routes});\n"
+
+
+def write_router(manifest, components, force=False):
+    return write_generated(RouterGenerator(components), manifest, force)
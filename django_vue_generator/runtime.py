@@ -0,0 +1,136 @@
+import os
+
+from django_vue_generator.utils import atomic_write
+
+RUNTIME_PATH = "frontend/src/vuegen-runtime.js"
+
+# shared by all generated components, see runtime_import
+RUNTIME_JS = """// Generated by django_vue_generator, overwritten by start_frontend.
+// Responses cache, request de-duplication and debouncing for generated components.
+
+export const settings = {
+  // cached responses
+  max: 200,
+  // ms a cached response is used for
+  ttl: 30000,
+  // ms filters have to be unchanged before lists are reloaded
+  debounce: 300,
+  // page selectors list every page up to this many pages
+  pages: 20,
+  // pages around the current one in longer page selectors
+  neighbours: 2,
+};
+
+const cache = new Map();
+const inflight = new Map();
+// never settles, returned for superseded requests
+const superseded = new Promise(() => {});
+
+function cacheKey(url, params) {
+  const keys = Object.keys(params || {}).filter(k => params[k] !== undefined).sort();
+  return keys.length ? `${url}?${keys.map(k => `${k}=${params[k]}`).join('&')}` : url;
+}
+
+function store(key, data) {
+  cache.delete(key);
+  cache.set(key, {time: Date.now(), data});
+  if (cache.size > settings.max) cache.delete(cache.keys().next().value);
+}
+
+// GET url with params as json. Responses are cached for ttl ms, concurrent
+// requests of the same url and params share one http request.
+export function cached(http, url, params, ttl = settings.ttl) {
+  const key = cacheKey(url, params);
+  const hit = cache.get(key);
+  if (hit && Date.now() - hit.time < ttl) {
+    // most recently used, but still expires ttl ms after it was fetched
+    cache.delete(key);
+    cache.set(key, hit);
+    return {key, promise: Promise.resolve(hit.data)};
+  }
+  let entry = inflight.get(key);
+  if (!entry) {
+    entry = {users: 0, request: null};
+    entry.promise = http.get(url, {params, before: r => {entry.request = r;}})
+      .then(r => r.json())
+      .then(data => {
+        store(key, data);
+        return data;
+      })
+      .finally(() => inflight.delete(key));
+    inflight.set(key, entry);
+  }
+  entry.users++;
+  return {key, promise: entry.promise, entry};
+}
+
+// Like cached, but only the last request of owner's channel resolves.
+// Earlier ones never settle and their http requests are aborted unless
+// another component waits for the same response.
+export function request(owner, channel, http, url, params, ttl) {
+  const pending = owner.$vuegenPending = owner.$vuegenPending || {};
+  if (pending[channel]) pending[channel]();
+  const {promise, entry} = cached(http, url, params, ttl);
+  let cancelled = false;
+  pending[channel] = () => {
+    cancelled = true;
+    if (entry && !--entry.users && entry.request) entry.request.abort();
+  };
+  return promise.then(
+    data => {
+      if (cancelled) return superseded;
+      delete pending[channel];
+      if (entry) entry.users--;
+      return data;
+    },
+    err => (cancelled ? superseded : Promise.reject(err))
+  );
+}
+
+// Forget cached responses of urls starting with prefix, after changes.
+export function invalidate(prefix) {
+  for (const key of [...cache.keys()]) {
+    if (key.startsWith(prefix)) cache.delete(key);
+  }
+}
+
+// Calls fn once owner's channel was quiet for wait ms.
+export function debounce(owner, channel, fn, wait = settings.debounce) {
+  const timers = owner.$vuegenTimers = owner.$vuegenTimers || {};
+  clearTimeout(timers[channel]);
+  timers[channel] = setTimeout(fn, wait);
+}
+
+// Page numbers for a page selector. All pages up to settings.pages pages,
+// otherwise the first, the last and neighbours of current with null for gaps.
+export function pageWindow(current, total, size = settings.pages, neighbours = settings.neighbours) {
+  if (total <= size) return Array.from({length: total}, (_, i) => i + 1);
+  current = Number(current);
+  const around = Array.from({length: 2 * neighbours + 1}, (_, i) => current - neighbours + i);
+  const pages = [];
+  let last = 0;
+  for (const p of [1, ...around, total]) {
+    if (p <= last || p > total) continue;
+    if (p > last + 1) pages.push(null);
+    pages.push(p);
+    last = p;
+  }
+  return pages;
+}
+"""
+
+
+def runtime_import(*names):
+    """Import of names from the runtime for components in src/components/."""
+    return f"import {{{', '.join(names)}}} from '../vuegen-runtime';\n"
+
+
+def write_runtime(path=RUNTIME_PATH):
+    """Writes the runtime unless it is up to date, returns whether it wrote."""
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == RUNTIME_JS:
+                return False
+    with atomic_write(path) as f:
+        f.write(RUNTIME_JS)
+    return True
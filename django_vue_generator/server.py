@@ -0,0 +1,239 @@
+import ast
+import gc
+import importlib
+import importlib.util
+import json
+import os
+import socketserver
+import sys
+import time
+import traceback
+
+from django.urls import clear_url_caches
+
+from django_vue_generator import fields, queries, resolver, vue
+from django_vue_generator.project import (
+    GENERATORS,
+    accepts,
+    import_object,
+    resolve_targets,
+    write_components,
+    write_summary,
+)
+
+
+class Restart(Exception):
+    """Changed modules can't be reloaded in place, e.g. models or settings."""
+
+
+def needs_restart(name):
+    parts = name.split(".")
+    return (
+        name == os.environ.get("DJANGO_SETTINGS_MODULE")
+        or parts[0] == "django_vue_generator"
+        or bool({"models", "apps", "migrations"} & set(parts))
+    )
+
+
+def imported_names(name, path):
+    """Modules the source of module name imports, relative imports resolved."""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), path)
+    package = (
+        name if os.path.basename(path) == "__init__.py" else name.rpartition(".")[0]
+    )
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = importlib.util.resolve_name(
+                "." * node.level + (node.module or ""), package
+            )
+            yield base
+            # from package import module
+            yield from (f"{base}.{alias.name}" for alias in node.names)
+
+
+class Reloader:
+    """
+    Watches the source files of modules under root. Changed modules are
+    reloaded along with every module importing them, dependencies first,
+    so e.g. views pick up a reloaded serializer class.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.join(os.path.abspath(root), "")
+        self.mtimes = dict(self.scan())
+        self.imports = {}
+
+    def modules(self):
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if (
+                path
+                and path.endswith(".py")
+                and os.path.abspath(path).startswith(self.root)
+                # a virtualenv inside the project
+                and "site-packages" not in path
+            ):
+                yield name, path
+
+    def scan(self):
+        for name, path in self.modules():
+            try:
+                yield name, os.stat(path).st_mtime
+            except OSError:
+                pass
+
+    def dependencies(self, name, path, mtime):
+        if self.imports.get(name, (None,))[0] != mtime:
+            self.imports[name] = mtime, set(imported_names(name, path))
+        return self.imports[name][1]
+
+    def changed(self):
+        current = dict(self.scan())
+        changed = {
+            name
+            for name, mtime in current.items()
+            if name in self.mtimes and mtime != self.mtimes[name]
+        }
+        self.mtimes = current
+        return changed
+
+    def reload(self):
+        """Reloads changed modules, returns their names in reload order."""
+        changed = self.changed()
+        if not changed:
+            return []
+        paths = dict(self.modules())
+        deps = {
+            name: self.dependencies(name, path, self.mtimes[name]) & set(paths)
+            for name, path in paths.items()
+            if name in self.mtimes
+        }
+        stale = set(changed)
+        while True:
+            importers = {n for n, d in deps.items() if d & stale} - stale
+            if not importers:
+                break
+            stale |= importers
+        if any(needs_restart(name) for name in stale):
+            raise Restart(", ".join(sorted(changed)))
+        order = []
+        visited = set()
+
+        def visit(name):
+            if name not in visited:
+                visited.add(name)
+                for dep in sorted(deps[name] & stale):
+                    visit(dep)
+                order.append(name)
+
+        for name in sorted(stale):
+            visit(name)
+        try:
+            for name in order:
+                importlib.reload(sys.modules[name])
+        except Exception:
+            # e.g. a syntax error, retried on the next request
+            self.mtimes.update(dict.fromkeys(stale))
+            raise
+        # caches keyed by the replaced classes and urlconf
+        clear_url_caches()
+        resolver.clear()
+        fields.clear()
+        queries.clear()
+        vue.clear()
+        gc.collect()
+        self.mtimes = dict(self.scan())
+        return order
+
+
+def parse(line):
+    """Request of a line sent by a client, ValueError if it isn't one."""
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise ValueError("Requests are json objects")
+    targets = request.get("targets")
+    if not (
+        isinstance(targets, list)
+        and targets
+        and all(isinstance(target, str) for target in targets)
+    ):
+        raise ValueError('"targets" has to be a list of dotted paths')
+    return request
+
+
+def respond(request):
+    generator = request.get("generator", "form")
+    if generator not in GENERATORS:
+        return {"errors": [f"Unknown generator {generator}"]}
+    try:
+        targets = resolve_targets(request["targets"], accepts(generator))
+    except (ImportError, AttributeError, ValueError) as e:
+        return {"errors": [str(e)]}
+    if not request.get("write"):
+        if len(targets) > 1:
+            return {"errors": [f"{len(targets)} components need write"]}
+        return {"content": GENERATORS[generator](import_object(targets[0])).render()}
+    results = write_components(targets, generator, request.get("force", False))
+    return {
+        "lines": list(write_summary(results)),
+        "errors": [f"{r.target}:\n{r.error}" for r in results if r.error],
+    }
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            start = time.perf_counter()
+            try:
+                request = parse(line)
+            except ValueError as e:
+                request, response = {}, {"errors": [f"Bad request: {e}"]}
+            else:
+                response = self.respond(request)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            targets = " ".join(request.get("targets", []))
+            self.server.log(
+                f"{request.get('generator', 'form')} {targets} "
+                f"{(time.perf_counter() - start) * 1000:.1f} ms"
+            )
+            if self.server.restart:
+                break
+
+    def respond(self, request):
+        try:
+            reloaded = self.server.reloader.reload()
+            response = respond(request)
+        except Restart as e:
+            self.server.log(f"{e} changed, restarting")
+            self.server.restart = True
+            # so the client's next attempt waits for the new process
+            self.server.server_close()
+            return {"restart": True}
+        except Exception:
+            return {"errors": [traceback.format_exc()]}
+        if reloaded:
+            self.server.log(f"reloaded {', '.join(reloaded)}")
+        return response
+
+
+class Server(socketserver.UnixStreamServer):
+    """
+    Serves one request at a time, Django and the generators' caches are not
+    made for concurrent use.
+    """
+
+    def __init__(self, path, root, log=print):
+        self.reloader = Reloader(root)
+        self.restart = False
+        self.log = log
+        super().__init__(path, Handler)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
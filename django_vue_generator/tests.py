@@ -1 +1,977 @@
+import gc
+import importlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from unittest import mock, skipUnless
 
+from django.contrib.auth.models import Group, Permission, User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+from rest_framework import pagination, routers, serializers, viewsets
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.viewsets import ModelViewSet
+
+from django_vue_generator import (
+    beautify,
+    bundles,
+    fields,
+    queries,
+    resolver,
+    toolchain,
+    vue,
+)
+from django_vue_generator.api import build_resource_names
+from django_vue_generator.forms import VueForm
+from django_vue_generator.lists import ListGenerator, VirtualListGenerator
+from django_vue_generator.manifest import Manifest, fingerprint
+from django_vue_generator.mixins import (
+    DefaultLimitOffsetPagination,
+    DefaultPaginationMixin,
+    FieldsProjectionMixin,
+)
+from django_vue_generator.project import accepts, resolve_targets
+from django_vue_generator.router import ROUTER_JS, RouterGenerator
+from django_vue_generator.server import Reloader, Restart, parse
+from django_vue_generator.vue import (
+    LazyContext,
+    Vue,
+    emit_js,
+    js_func,
+    js_lambda,
+    js_str,
+    py_to_js,
+)
+
+
+class UserSerializer(serializers.ModelSerializer):
+    groups = serializers.SlugRelatedField(many=True, slug_field="name", read_only=True)
+
+    class Meta:
+        model = User
+        fields = ["id", "username", "email", "groups"]
+
+
+class PermissionSerializer(serializers.ModelSerializer):
+    content_type = serializers.StringRelatedField()
+
+    class Meta:
+        model = Permission
+        fields = ["id", "codename", "content_type"]
+
+
+class UserViewSet(ModelViewSet):
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
+
+
+class GroupViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Group.objects.all()
+    serializer_class = serializers.Serializer
+
+
+router = routers.SimpleRouter()
+router.register("users", UserViewSet)
+router.register("groups", GroupViewSet)
+urlpatterns = router.urls
+
+
+def user_form_serializer(max_length):
+    """New serializer class each call, like after editing and reloading it."""
+
+    class UserFormSerializer(serializers.ModelSerializer):
+        username = serializers.CharField(max_length=max_length)
+
+        class Meta:
+            model = User
+            fields = ["id", "username"]
+
+    return UserFormSerializer
+
+
+class BeautifyWorkerTests(SimpleTestCase):
+    def test_without_node_python_formatter_is_used(self):
+        worker = beautify.BeautifyWorker()
+        with mock.patch(
+            "django_vue_generator.beautify.shutil.which", return_value=None
+        ):
+            self.assertEqual(worker("f(){a;}", "js"), "f(){\n  a;\n}\n")
+        self.assertFalse(worker.available)
+
+    @skipUnless(shutil.which("node"), "needs node")
+    def test_stuck_worker_is_killed_and_not_used_again(self):
+        stuck = (
+            "process.stdout.write(JSON.stringify({id: 0, result: 'ready'}) + '\\n');"
+            "setInterval(() => {}, 1000);"
+        )
+        worker = beautify.BeautifyWorker()
+        self.addCleanup(worker.close)
+        with mock.patch.object(beautify, "WORKER_JS", stuck), mock.patch.object(
+            beautify, "TIMEOUT", 0.5
+        ):
+            start = time.perf_counter()
+            self.assertEqual(worker("a;b;", "js"), "a;\nb;\n")
+            self.assertLess(time.perf_counter() - start, 5)
+            self.assertFalse(worker.available)
+            self.assertIsNone(worker.process)
+            self.assertEqual(worker("c;", "js"), "c;\n")
+
+
+class PythonBeautifyTests(SimpleTestCase):
+    def assertFormats(self, src, expected):
+        self.assertEqual(beautify.format_js(src), expected)
+
+    def test_blocks_are_indented(self):
+        self.assertFormats(
+            "if (a) {b(); c = {d: [1, 2]};} else {e();}",
+            "if (a) {\n  b();\n  c = {\n    d: [1, 2]\n  };\n} else {\n  e();\n}\n",
+        )
+
+    def test_regex_literals_are_kept(self):
+        self.assertFormats(
+            "const r = /[{}]\\/\\//g; return /}/.test(s);",
+            "const r = /[{}]\\/\\//g;\nreturn /}/.test(s);\n",
+        )
+
+    def test_division_is_not_a_regex(self):
+        self.assertFormats("x = (a) / 2 / {b;}", "x = (a) / 2 / {\n  b;\n}\n")
+
+    def test_template_literals_are_kept(self):
+        self.assertFormats(
+            "s = `{;\n${ {a: 1}.a } ${`${b}}`} }`; t;",
+            "s = `{;\n${ {a: 1}.a } ${`${b}}`} }`;\nt;\n",
+        )
+
+    def test_strings_and_comments_are_kept(self):
+        self.assertFormats(
+            "a = '{;'; /* {; */ b = \"}\"; // {\nc;",
+            "a = '{;';\n/* {; */ b = \"}\";\n// {\nc;\n",
+        )
+
+    def test_vue_blocks(self):
+        src = (
+            "<template><div><p>x</p><input v-model='a'></div></template>\n"
+            "<script>export default {name: 'x'};</script>\n"
+            "<style>.a{color:red;}</style>"
+        )
+        self.assertEqual(
+            beautify.python_beautify(src),
+            "<template>\n  <div>\n    <p>x</p>\n    <input v-model='a'>\n  </div>\n"
+            "</template>\n\n<script>\nexport default {\n  name: 'x'\n};\n</script>\n\n"
+            "<style>\n.a {\n  color:red;\n}\n</style>\n",
+        )
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ResolverTests(SimpleTestCase):
+    def setUp(self):
+        resolver.clear()
+
+    def test_build_index(self):
+        index = resolver.build_index(get_resolver(__name__))
+        self.assertEqual(index[UserViewSet], ("users/", "users", "user"))
+        # no create/update routes
+        self.assertEqual(index[GroupViewSet], (None, None, "group"))
+
+    def test_index_is_built_once_per_resolver(self):
+        self.assertIs(resolver.get_index(), resolver.get_index())
+        self.assertEqual(resolver.viewset_urls(UserViewSet).list_url, "users/")
+        self.assertEqual(resolver.viewset_urls(VueForm), (None, None, None))
+
+    def test_model_viewset_needs_a_list_url(self):
+        self.assertIs(resolver.model_viewset(User), UserViewSet)
+        self.assertIsNone(resolver.model_viewset(Group))
+
+    def test_index_cache_is_emptied_with_the_index(self):
+        resolver.index_cache()["key"] = "value"
+        resolver.clear()
+        self.assertNotIn("key", resolver.index_cache())
+
+
+class ResourceNamesTests(SimpleTestCase):
+    def test_build_resource_names(self):
+        class A:
+            pass
+
+        class B:
+            pass
+
+        class C:
+            pass
+
+        class D:
+            pass
+
+        class E:
+            pass
+
+        class F:
+            pass
+
+        class G:
+            pass
+
+        index = {
+            A: resolver.ViewsetUrls("a/", "a", "class"),
+            B: resolver.ViewsetUrls("b/", "b", "my-books"),
+            C: resolver.ViewsetUrls("c/", None, "my_books"),
+            D: resolver.ViewsetUrls(None, "d", "1st"),
+            E: resolver.ViewsetUrls("e/", "e", None),
+            # not routed
+            F: resolver.ViewsetUrls(None, None, "f"),
+            G: resolver.ViewsetUrls("g/", "g", "resource"),
+        }
+        self.assertEqual(
+            build_resource_names(index),
+            {
+                A: "class_",
+                B: "my_books",
+                C: "my_books_2",
+                D: "_1st",
+                E: "E",
+                G: "resource_",
+            },
+        )
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class FingerprintTests(SimpleTestCase):
+    def test_same_inputs_same_fingerprint(self):
+        self.assertEqual(
+            fingerprint(VueForm(user_form_serializer(100))),
+            fingerprint(VueForm(user_form_serializer(100))),
+        )
+
+    def test_changed_field_changes_fingerprint(self):
+        self.assertNotEqual(
+            fingerprint(VueForm(user_form_serializer(100))),
+            fingerprint(VueForm(user_form_serializer(150))),
+        )
+
+    def test_changed_generator_changes_fingerprint(self):
+        generator = VueForm(user_form_serializer(100))
+        digest = fingerprint(generator)
+        with mock.patch(
+            "django_vue_generator.manifest.generator_hash", return_value="changed"
+        ):
+            self.assertNotEqual(fingerprint(generator), digest)
+
+    def test_manifest_skips_unchanged_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        filename = os.path.join(directory, "UserForm.vue")
+        path = os.path.join(directory, "manifest.json")
+        digest = fingerprint(VueForm(user_form_serializer(100)))
+        manifest = Manifest(path)
+        self.assertTrue(manifest.changed(filename, digest))
+        open(filename, "w").close()
+        manifest.update(filename, digest)
+        manifest.save()
+        manifest = Manifest(path)
+        self.assertFalse(manifest.changed(filename, digest))
+        self.assertTrue(manifest.changed(filename, "other"))
+        # deleted files are written again
+        os.unlink(filename)
+        self.assertTrue(manifest.changed(filename, digest))
+
+
+class CountingMessage(str):
+    """Error message which counts how often it is formatted."""
+
+    def format_map(self, mapping):
+        self.calls = getattr(self, "calls", 0) + 1
+        return super().format_map(mapping)
+
+
+class ErrorMessagesTests(SimpleTestCase):
+    def setUp(self):
+        fields.clear()
+
+    def test_each_message_is_formatted_once(self):
+        class CountingField(serializers.CharField):
+            default_error_messages = {
+                "max_length": CountingMessage("At most {max_length} characters."),
+                "min_length": CountingMessage("At least {min_length} characters."),
+                "blank": CountingMessage("Not blank."),
+            }
+
+        class CountingSerializer(serializers.ModelSerializer):
+            username = CountingField(max_length=5)
+
+            class Meta:
+                model = User
+                fields = ["id", "username"]
+
+        messages = CountingField.default_error_messages
+        for i in range(2):
+            self.assertEqual(
+                VueForm(CountingSerializer).error_messages()["username"],
+                {
+                    "required": "This field is required.",
+                    "invalid": "Not a valid string.",
+                    "max_length": "At most 5 characters.",
+                },
+            )
+        self.assertEqual(messages["max_length"].calls, 1)
+        # formatted to "At least None characters." and dropped
+        self.assertEqual(messages["min_length"].calls, 1)
+        self.assertFalse(hasattr(messages["blank"], "calls"))
+
+
+class EmitJsTests(SimpleTestCase):
+    def value(self):
+        return {
+            "a": 1,
+            "b": [1.5, "\u00e9", None, True],
+            "c": {"d": js_str("x.y"), "e": js_func("v", "return v;")},
+            "f": ((k, {"n": k}) for k in "xy"),
+            "g": js_lambda(["a", "b"], "a + b"),
+            "h": {},
+        }
+
+    def test_py_to_js(self):
+        self.assertEqual(
+            py_to_js(self.value()),
+            '{a: 1,b: [1.5, "\\u00e9", null, true],c: {d: x.y,e(v) {return v;}},'
+            'f: {x: {n: "x"},y: {n: "y"}},g: (a,b) => a + b,h: {}}',
+        )
+
+    def test_emit_js_writes_chunks(self):
+        chunks = []
+        emit_js(self.value(), chunks.append)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), py_to_js(self.value()))
+
+    def test_script(self):
+        class Test(Vue):
+            data = {"a": [1, 2, 3], "component_name": js_str("this.name")}
+            computed = {
+                "b": js_lambda("", "this.name"),
+                "c": js_lambda("", "let c=3; return c;"),
+                "d": "return 4",
+            }
+
+            @property
+            def methods(self):
+                yield "do_a", js_func("a", "return 1")
+                yield "do_b", "return 2"
+
+            props = ["p"]
+            watch = {"p": "do_a(newVal)"}
+            mounted = "this.do_a(1);"
+
+        self.assertEqual(
+            Test().script(),
+            "\n\nexport default {name: 'test',"
+            "data() {return {a: [1, 2, 3],component_name: this.name}},"
+            "methods: {do_a(a) {return 1},do_b() {return 2}},"
+            "computed: {b: () => this.name,c: () => {let c=3; return c;},d() {return 4}},"
+            'props: ["p"],watch: {p(newVal,oldVal) {do_a(newVal)}},'
+            "mounted() {this.do_a(1);}};",
+        )
+
+
+class GroupChoicesSerializer(serializers.ModelSerializer):
+    groups = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Group.objects.all(), html_cutoff=2
+    )
+    group = serializers.SlugRelatedField(
+        source="groups", slug_field="name", queryset=Group.objects.all()
+    )
+
+    class Meta:
+        model = User
+        fields = ["id", "username", "groups", "group"]
+
+
+class FieldInfoTests(TestCase):
+    def setUp(self):
+        fields.clear()
+        for i in range(3):
+            Group.objects.create(name=f"group{i}")
+
+    def test_is_frozen(self):
+        info = fields.describe(UserSerializer)[1]
+        self.assertEqual(info.name, "username")
+        with self.assertRaises(AttributeError):
+            info.name = "email"
+        with self.assertRaises(AttributeError):
+            info.other = None
+
+    def test_fields_are_described_once(self):
+        with mock.patch.object(
+            UserSerializer,
+            "get_fields",
+            autospec=True,
+            side_effect=UserSerializer.get_fields,
+        ) as get_fields:
+            self.assertIs(
+                fields.describe(UserSerializer), fields.describe(UserSerializer)
+            )
+        get_fields.assert_called_once()
+
+    def test_serializer_is_not_kept(self):
+        infos = fields.describe(GroupChoicesSerializer)
+        gc.collect()
+        self.assertFalse(
+            [o for o in gc.get_objects() if isinstance(o, GroupChoicesSerializer)]
+        )
+        # options still come from the database like DRF's
+        expected = {
+            name: [(o.value, o.display_text) for o in field.iter_options()]
+            for name, field in GroupChoicesSerializer().fields.items()
+            if name in ("groups", "group")
+        }
+        self.assertEqual(len(expected["groups"]), 3)
+        for info in infos[2:]:
+            self.assertEqual(list(info.iter_options()), expected[info.name])
+
+
+class ListPlanTests(TestCase):
+    def setUp(self):
+        queries.clear()
+        for i in range(3):
+            user = User.objects.create(username=f"user{i}")
+            group = Group.objects.create(name=f"group{i}")
+            user.groups.add(group)
+
+    def count_queries(self, serializer_class, queryset):
+        with CaptureQueriesContext(connection) as context:
+            serializer_class(queryset, many=True).data
+        return len(context.captured_queries)
+
+    def test_related_fields_take_one_query_each(self):
+        users = queries.list_plan(UserSerializer).apply(User.objects.all())
+        self.assertEqual(self.count_queries(UserSerializer, users), 2)
+        self.assertEqual(self.count_queries(UserSerializer, User.objects.all()), 1 + 3)
+
+    def test_string_related_field_is_joined(self):
+        plan = queries.list_plan(PermissionSerializer)
+        self.assertEqual(plan.select_related, ["content_type"])
+        permissions = plan.apply(Permission.objects.all())
+        self.assertEqual(self.count_queries(PermissionSerializer, permissions), 1)
+
+    def test_only_loads_columns_of_serialized_fields(self):
+        plan = queries.list_plan(UserSerializer)
+        self.assertEqual(plan.only, {"id", "username", "email"})
+
+    def test_requested_fields(self):
+        plan = queries.list_plan(UserSerializer, frozenset({"username"}))
+        self.assertEqual(plan.only, {"id", "username"})
+        self.assertEqual(plan.prefetch_related, [])
+
+    def test_unknown_field_names_share_the_plan_of_all_fields(self):
+        plan = queries.list_plan(UserSerializer)
+        for i in range(10):
+            self.assertIs(queries.list_plan(UserSerializer, frozenset({f"x{i}"})), plan)
+        self.assertEqual(len(queries._cache), 1)
+
+    def test_cache_is_bounded(self):
+        with mock.patch.object(queries, "MAX_PLANS", 2):
+            for name in ["id", "username", "email"]:
+                queries.list_plan(UserSerializer, frozenset({name}))
+        self.assertEqual(len(queries._cache), 2)
+
+
+class ProjectedUserSerializer(FieldsProjectionMixin, UserSerializer):
+    pass
+
+
+class FieldsProjectionMixinTests(SimpleTestCase):
+    def field_names(self, query):
+        request = Request(APIRequestFactory().get("/users/", query))
+        serializer = ProjectedUserSerializer(context={"request": request})
+        return list(serializer.fields)
+
+    def test_requested_fields(self):
+        self.assertEqual(
+            self.field_names({"fields": "id, username"}), ["id", "username"]
+        )
+
+    def test_unknown_field_names_are_ignored(self):
+        self.assertEqual(self.field_names({"fields": "email,password"}), ["email"])
+
+    def test_all_fields_without_known_field_names(self):
+        all_fields = ["id", "username", "email", "groups"]
+        self.assertEqual(self.field_names({}), all_fields)
+        self.assertEqual(self.field_names({"fields": "password"}), all_fields)
+        self.assertEqual(list(ProjectedUserSerializer().fields), all_fields)
+
+
+class DefaultPaginationMixinTests(SimpleTestCase):
+    def test_viewset_without_pagination_is_limited(self):
+        class Unpaginated(DefaultPaginationMixin, UserViewSet):
+            pagination_class = None
+
+        self.assertIs(Unpaginated.pagination_class, DefaultLimitOffsetPagination)
+        self.assertIsNotNone(DefaultLimitOffsetPagination.default_limit)
+
+    def test_pagination_class_is_kept(self):
+        class Paginated(DefaultPaginationMixin, UserViewSet):
+            pagination_class = pagination.CursorPagination
+
+        self.assertIs(Paginated.pagination_class, pagination.CursorPagination)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ListGeneratorTests(SimpleTestCase):
+    def test_unpaginated_viewset_is_refused(self):
+        class Unpaginated(UserViewSet):
+            pagination_class = None
+
+        with self.assertRaisesMessage(ValueError, "DefaultPaginationMixin"):
+            ListGenerator(Unpaginated)
+
+        class Limited(DefaultPaginationMixin, Unpaginated):
+            pass
+
+        self.assertEqual(ListGenerator(Limited).paging, "limit")
+
+    def test_page_params(self):
+        class Paged(UserViewSet):
+            pagination_class = pagination.PageNumberPagination
+
+        generator = ListGenerator(Paged)
+        self.assertEqual(generator.paging, "page")
+        self.assertEqual(generator.page_params(), "{page:this.page}")
+        self.assertIn("pages", dict(generator.computed()))
+
+    def test_cursor_pagination(self):
+        class Cursor(pagination.CursorPagination):
+            cursor_query_param = "c"
+            ordering = "id"
+
+        class Cursored(UserViewSet):
+            pagination_class = Cursor
+
+        generator = ListGenerator(Cursored)
+        self.assertEqual(generator.paging, "cursor")
+        self.assertEqual(
+            dict(generator.data),
+            {"objects": [], "cursor": None, "next": None, "previous": None},
+        )
+        self.assertEqual(generator.page_params(), "this.cursor?{c:this.cursor}:{}")
+        methods = dict(generator.methods())
+        self.assertIn("this.next = r.next;", methods["list"])
+        self.assertNotIn("this.count", methods["list"])
+        self.assertIn("searchParams.get('c')", methods["go"])
+        watch = dict(generator.watch())
+        # new filters keep the cursor
+        self.assertNotIn("this.page", watch["filters"])
+        self.assertIn("cursor", watch)
+        self.assertIn('@click="go(next)"', generator.template())
+        self.assertEqual(dict(generator.computed()), {})
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class VirtualListGeneratorTests(SimpleTestCase):
+    def setUp(self):
+        class Paged(UserViewSet):
+            pagination_class = pagination.PageNumberPagination
+
+        self.generator = VirtualListGenerator(Paged)
+        self.list_generator = ListGenerator(Paged)
+
+    def test_only_visible_rows_are_mounted(self):
+        template = self.generator.template()
+        self.assertIn('ref="viewport" @scroll="onScroll"', template)
+        self.assertIn('v-for="object in visible"', template)
+        # slots of ListGenerator
+        self.assertIn('<slot name="header"', template)
+        self.assertIn('<slot name="object"', template)
+        self.assertNotIn('<slot name="pagination"', template)
+        self.assertEqual(
+            list(dict(self.generator.computed())),
+            ["objects", "first", "visible", "top", "bottom"],
+        )
+
+    def test_pages_are_buffered(self):
+        data = dict(self.generator.data)
+        self.assertNotIn("objects", data)
+        self.assertEqual(data["pages"], [])
+        methods = dict(self.generator.methods())
+        self.assertEqual(
+            list(methods), ["toPage", "list", "load", "fill", "onScroll", "showField"]
+        )
+        self.assertIn("api.follow(this, url)", methods["load"])
+        self.assertIn(
+            f"this.pages.length > {VirtualListGenerator.buffer_pages}", methods["load"]
+        )
+
+    def test_shares_list_generator_methods(self):
+        methods = dict(self.list_generator.methods())
+        virtual_methods = dict(self.generator.methods())
+        self.assertEqual(virtual_methods["showField"], methods["showField"])
+        field_params = f"let field_params={self.list_generator.field_params()};"
+        self.assertIn(field_params, methods["list"])
+        self.assertIn(field_params, virtual_methods["list"])
+
+
+class RouterGeneratorTests(SimpleTestCase):
+    def setUp(self):
+        self.generator = RouterGenerator(
+            [
+                ("list", "frontend/src/components/UserList.vue"),
+                ("form", "frontend/src/components/UserForm.vue"),
+                ("virtual", "frontend/src/components/GroupList.vue"),
+            ]
+        )
+
+    def test_routes(self):
+        self.assertEqual(
+            self.generator.routes,
+            [
+                ("/user/new", "user-new", "user", "UserForm", {}),
+                ("/user/:pk", "user-edit", "user", "UserForm", {"props": True}),
+                ("/user", "user-list", "user", "UserList", {}),
+                ("/group", "group-list", "group", "GroupList", {}),
+            ],
+        )
+
+    def test_components_are_imported_into_one_chunk_per_model(self):
+        source = "".join(self.generator.source())
+        self.assertTrue(source.startswith(ROUTER_JS))
+        self.assertIn(
+            "{path: '/user/:pk', name: 'user-edit', component: () => "
+            "import(/* webpackChunkName: \"user\" */ './components/UserForm.vue'), "
+            "props: true}",
+            source,
+        )
+        self.assertIn(
+            "component: () => "
+            "import(/* webpackChunkName: \"group\" */ './components/GroupList.vue')}",
+            source,
+        )
+        self.assertNotIn("import User", source)
+        self.assertTrue(source.endswith("export default new VueRouter({routes});\n"))
+
+
+FAKE_YARN = """#!/bin/sh
+case "$1" in
+  --version) echo 1.22.0;;
+  global) echo "{directory}/global-$2";;
+esac
+"""
+
+
+@skipUnless(os.name == "posix", "needs sh")
+class ToolchainTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.bin = os.path.join(self.directory, "bin")
+        os.mkdir(self.bin)
+        self.add_binary("node", "#!/bin/sh\necho v12.0.0\n")
+        self.add_binary("yarn", FAKE_YARN.format(directory=self.directory))
+        self.yarnrc = os.path.join(self.directory, ".yarnrc")
+        self.state_path = os.path.join(self.directory, "state", "toolchain.json")
+        for patcher in [
+            mock.patch.dict(os.environ, {"PATH": self.bin}),
+            mock.patch.object(toolchain, "YARNRC", self.yarnrc),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def add_binary(self, name, script):
+        path = os.path.join(self.bin, name)
+        with open(path, "w") as f:
+            f.write(script)
+        os.chmod(path, 0o755)
+        return path
+
+    def test_probe(self):
+        tools = toolchain.Toolchain.probe()
+        self.assertEqual(tools.binary("node"), os.path.join(self.bin, "node"))
+        self.assertEqual(tools.version("node"), "v12.0.0")
+        self.assertIsNone(tools.binary("vue"))
+        self.assertEqual(tools.global_bin, f"{self.directory}/global-bin")
+        self.assertEqual(tools.global_packages(), {})
+        os.mkdir(f"{self.directory}/global-dir")
+        with open(f"{self.directory}/global-dir/package.json", "w") as f:
+            json.dump({"dependencies": {"@vue/cli": "^4.0.0"}}, f)
+        self.assertTrue(tools.has_global("@vue/cli"))
+
+    def test_fresh(self):
+        tools = toolchain.Toolchain.probe()
+        self.assertTrue(tools.fresh())
+        node = tools.binary("node")
+        mtime = os.stat(node).st_mtime
+        os.utime(node, (mtime + 10, mtime + 10))
+        self.assertFalse(tools.fresh())
+        os.utime(node, (mtime, mtime))
+        self.assertTrue(tools.fresh())
+        # yarn config set prefix
+        open(self.yarnrc, "w").close()
+        self.assertFalse(tools.fresh())
+        tools = toolchain.Toolchain.probe()
+        self.add_binary("vue", "#!/bin/sh\n")
+        self.assertFalse(tools.fresh())
+
+    def test_state_is_saved_and_probed_again_when_stale(self):
+        probe = mock.patch.object(
+            toolchain.Toolchain, "probe", wraps=toolchain.Toolchain.probe
+        )
+        with probe as probed:
+            tools = toolchain.toolchain(path=self.state_path)
+            self.assertEqual(
+                toolchain.toolchain(path=self.state_path).state, tools.state
+            )
+            self.assertEqual(probed.call_count, 1)
+            toolchain.toolchain(refresh=True, path=self.state_path)
+            self.assertEqual(probed.call_count, 2)
+            os.unlink(tools.binary("node"))
+            self.assertIsNone(toolchain.toolchain(path=self.state_path).binary("node"))
+            self.assertEqual(probed.call_count, 3)
+            # state written by another version
+            with open(self.state_path, "w") as f:
+                json.dump({"binaries": {}}, f)
+            toolchain.toolchain(path=self.state_path)
+            self.assertEqual(probed.call_count, 4)
+
+
+class BuildStateTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_source_hash(self):
+        main = self.write("src/main.js", "main();")
+        self.write("package.json", "{}")
+        digest = bundles.source_hash(self.directory)
+        # not read by yarn build
+        self.write("node_modules/vue/index.js", "vue();")
+        os.utime(main, (0, 0))
+        self.assertEqual(bundles.source_hash(self.directory), digest)
+        self.write("src/main.js", "main(1);")
+        changed = bundles.source_hash(self.directory)
+        self.assertNotEqual(changed, digest)
+        os.rename(main, os.path.join(self.directory, "src", "app.js"))
+        self.assertNotEqual(bundles.source_hash(self.directory), changed)
+
+    def test_restore_mtimes(self):
+        for name in ["js/app.js", "js/chunk.js"]:
+            os.utime(self.write(name, name), (1000, 1000))
+        before = bundles.outputs(self.directory)
+        # rebuilt
+        app = self.write("js/app.js", "js/app.js")
+        self.write("js/chunk.js", "changed")
+        self.write("new.js", "new")
+        self.assertNotEqual(os.stat(app).st_mtime, 1000)
+        self.assertEqual(
+            bundles.restore_mtimes(before, self.directory),
+            [os.path.join("js", "chunk.js"), "new.js"],
+        )
+        self.assertEqual(os.stat(app).st_mtime, 1000)
+        self.assertNotEqual(
+            os.stat(os.path.join(self.directory, "js", "chunk.js")).st_mtime, 1000
+        )
+
+
+class Counted:
+    def __init__(self):
+        self.calls = []
+
+    @property
+    def used(self):
+        self.calls.append("used")
+        return "vue"
+
+    @property
+    def unused(self):
+        self.calls.append("unused")
+        return "unused"
+
+
+class TemplateComponent(Counted, Vue):
+    source = "<h1>{{ used }}</h1>"
+    engine = "django"
+
+    def template(self):
+        return self.compile(self.source, self.engine)
+
+
+class VueTemplateTests(SimpleTestCase):
+    def setUp(self):
+        vue.clear()
+
+    def test_lazy_context(self):
+        obj = Counted()
+        context = LazyContext(obj)
+        self.assertIn("used", context)
+        self.assertEqual(obj.calls, [])
+        self.assertEqual(context["used"], "vue")
+        self.assertEqual(context["used"], "vue")
+        self.assertEqual(obj.calls, ["used"])
+        self.assertNotIn("missing", context)
+        with self.assertRaises(KeyError):
+            context["missing"]
+        self.assertIn("unused", list(context))
+        self.assertEqual(obj.calls, ["used"])
+
+    def test_templates_are_compiled_once_per_class(self):
+        class Other(TemplateComponent):
+            pass
+
+        template = TemplateComponent.compile("<p></p>", "django")
+        self.assertIs(TemplateComponent.compile("<p></p>", "django"), template)
+        self.assertIsNot(Other.compile("<p></p>", "django"), template)
+        self.assertIsNot(TemplateComponent.compile("<div></div>", "django"), template)
+        with self.assertRaisesMessage(ValueError, "Unknown template engine mako"):
+            TemplateComponent.compile("<p></p>", "mako")
+        vue.clear()
+        self.assertIsNot(TemplateComponent.compile("<p></p>", "django"), template)
+
+    def assertRenders(self, component, expected):
+        blocks = {tag: content for tag, _, content in component.blocks()}
+        self.assertEqual(blocks["template"], expected)
+        self.assertEqual(component.calls, ["used"])
+
+    def test_django_template(self):
+        self.assertRenders(TemplateComponent(), "<h1>vue</h1>")
+
+    @skipUnless(importlib.util.find_spec("jinja2"), "needs jinja2")
+    def test_jinja2_template(self):
+        import jinja2
+
+        class JinjaComponent(TemplateComponent):
+            source = (
+                "<h1>{{ used }}</h1>{{ range(2)|join(',') }}"
+                "{% raw %}<p>{{ i }}</p>{% endraw %}"
+            )
+            engine = "jinja2"
+
+        self.assertRenders(JinjaComponent(), "<h1>vue</h1>0,1<p>{{ i }}</p>")
+
+        class Broken(JinjaComponent):
+            source = "{{ missing.attr }}"
+
+        with self.assertRaisesMessage(jinja2.UndefinedError, "'missing' is undefined"):
+            dict((tag, content) for tag, _, content in Broken().blocks())
+
+
+class ResolveTargetsTests(SimpleTestCase):
+    def test_wildcards_match_classes_defined_in_the_module(self):
+        self.assertEqual(
+            resolve_targets([f"{__name__}.*ViewSet"], accepts("list")),
+            [f"{__name__}.GroupViewSet", f"{__name__}.UserViewSet"],
+        )
+
+    def test_generators_accept_their_target_types(self):
+        self.assertNotIn(
+            f"{__name__}.UserSerializer",
+            resolve_targets([f"{__name__}.*"], accepts("list")),
+        )
+        self.assertIn(
+            f"{__name__}.UserSerializer",
+            resolve_targets([f"{__name__}.*"], accepts("form")),
+        )
+
+    def test_imported_classes_are_skipped(self):
+        self.assertNotIn(
+            f"{__name__}.ModelViewSet", resolve_targets([f"{__name__}.*ViewSet"])
+        )
+
+    def test_paths_and_patterns_are_deduplicated(self):
+        self.assertEqual(
+            resolve_targets(
+                [f"{__name__}.UserViewSet", f"{__name__}.User*"], accepts("list")
+            ),
+            [f"{__name__}.UserViewSet"],
+        )
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            resolve_targets([f"{__name__}.Nothing*"])
+        with self.assertRaises(AttributeError):
+            resolve_targets([f"{__name__}.Nothing"])
+
+
+class ReloaderTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.package = f"vuegen_reload_{uuid.uuid4().hex}"
+        os.mkdir(os.path.join(self.root, self.package))
+        self.mtime = time.time()
+        self.write("__init__", "")
+        self.write("base", "VALUE = 1\n")
+        self.write("middle", "from . import base\n\nVALUE = base.VALUE + 1\n")
+        self.write("top", "from .middle import VALUE\n\nTOTAL = VALUE * 10\n")
+        self.write("other", "X = 1\n")
+        sys.path.insert(0, self.root)
+        self.addCleanup(sys.path.remove, self.root)
+        self.addCleanup(self.unload)
+        importlib.invalidate_caches()
+        importlib.import_module(f"{self.package}.top")
+        importlib.import_module(f"{self.package}.other")
+        self.reloader = Reloader(self.root)
+
+    def unload(self):
+        for name in list(sys.modules):
+            if name.startswith(self.package):
+                del sys.modules[name]
+
+    def write(self, name, source):
+        path = os.path.join(self.root, self.package, f"{name}.py")
+        with open(path, "w") as f:
+            f.write(source)
+        # whole seconds later, so that cached bytecode is stale too
+        self.mtime += 10
+        os.utime(path, (self.mtime, self.mtime))
+
+    def module(self, name):
+        return sys.modules[f"{self.package}.{name}"]
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.reloader.reload(), [])
+
+    def test_importers_are_reloaded_after_their_dependencies(self):
+        self.write("base", "VALUE = 2\n")
+        self.assertEqual(
+            self.reloader.reload(),
+            [f"{self.package}.{name}" for name in ["base", "middle", "top"]],
+        )
+        self.assertEqual(self.module("top").TOTAL, 30)
+        self.assertEqual(self.reloader.reload(), [])
+
+    def test_failed_reload_is_retried(self):
+        self.write("base", "VALUE = (\n")
+        with self.assertRaises(SyntaxError):
+            self.reloader.reload()
+        self.write("base", "VALUE = 3\n")
+        self.assertIn(f"{self.package}.top", self.reloader.reload())
+        self.assertEqual(self.module("top").TOTAL, 40)
+
+    def test_models_need_a_restart(self):
+        self.write("models", "from . import base\n")
+        importlib.invalidate_caches()
+        importlib.import_module(f"{self.package}.models")
+        self.reloader = Reloader(self.root)
+        self.write("base", "VALUE = 2\n")
+        with self.assertRaises(Restart):
+            self.reloader.reload()
+
+
+class ServerRequestTests(SimpleTestCase):
+    def test_parse(self):
+        request = {"generator": "list", "targets": ["app.views.BookViewSet"]}
+        self.assertEqual(parse(json.dumps(request).encode()), request)
+
+    def test_bad_requests(self):
+        for line in [b"{bad", b"[]", b"{}", b'{"targets": "app.views.BookViewSet"}']:
+            with self.subTest(line=line), self.assertRaises(ValueError):
+                parse(line)
@@ -0,0 +1,131 @@
+import json
+import os
+import shutil
+import subprocess
+
+STATE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "django_vue_generator",
+    "toolchain.json",
+)
+BINARIES = ["node", "npm", "yarn", "vue"]
+# yarn config set prefix changes where global packages go
+YARNRC = os.path.expanduser("~/.yarnrc")
+
+
+def stamp(path):
+    """mtime of path, None if it doesn't exist."""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def output(*cmd):
+    """Stripped stdout of cmd, None if it fails."""
+    try:
+        return subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Toolchain:
+    """
+    Paths and versions of node binaries and yarn's global directories.
+    Probing runs every binary and yarn twice, which takes seconds, so the
+    result is kept in STATE_PATH and only probed again once a binary or
+    ~/.yarnrc changes. Global packages are read from yarn's global
+    package.json instead of `yarn global list`.
+    """
+
+    def __init__(self, state):
+        self.state = state
+
+    @classmethod
+    def probe(cls):
+        binaries = {}
+        for name in BINARIES:
+            path = shutil.which(name)
+            binaries[name] = path and {
+                "path": path,
+                "mtime": stamp(path),
+                "version": output(path, "--version"),
+            }
+        yarn = binaries["yarn"] and binaries["yarn"]["path"]
+        return cls(
+            {
+                "binaries": binaries,
+                "yarnrc": stamp(YARNRC),
+                "global_dir": yarn and output(yarn, "global", "dir"),
+                "global_bin": yarn and output(yarn, "global", "bin"),
+            }
+        )
+
+    def fresh(self):
+        for name, info in self.state["binaries"].items():
+            path = shutil.which(name)
+            if path != (info and info["path"]):
+                return False
+            if path and stamp(path) != info["mtime"]:
+                return False
+        return stamp(YARNRC) == self.state["yarnrc"]
+
+    def binary(self, name):
+        info = self.state["binaries"].get(name)
+        return info and info["path"]
+
+    def version(self, name):
+        info = self.state["binaries"].get(name)
+        return info and info["version"]
+
+    @property
+    def global_bin(self):
+        return self.state["global_bin"]
+
+    def global_packages(self):
+        if not self.state["global_dir"]:
+            return {}
+        try:
+            with open(os.path.join(self.state["global_dir"], "package.json")) as f:
+                return json.load(f).get("dependencies", {})
+        except (OSError, ValueError):
+            return {}
+
+    def has_global(self, package):
+        return package in self.global_packages()
+
+    def save(self, path=STATE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+
+
+def load(path=STATE_PATH):
+    try:
+        with open(path) as f:
+            return Toolchain(json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+def toolchain(refresh=False, path=STATE_PATH):
+    """Toolchain from the state file, probed again if anything changed."""
+    tools = None if refresh else load(path)
+    try:
+        if tools is not None and tools.fresh():
+            return tools
+    except (KeyError, TypeError):
+        # state written by another version
+        pass
+    tools = Toolchain.probe()
+    try:
+        tools.save(path)
+    except OSError:
+        pass
+    return tools
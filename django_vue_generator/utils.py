@@ -1,38 +1,41 @@
 from contextlib import contextmanager
-from subprocess import Popen, PIPE
+import json
 import os
+import shlex
+import shutil
+import stat
+import tempfile
 
+from django_vue_generator.beautify import beautify
+from django_vue_generator.process import execute
+from django_vue_generator.toolchain import toolchain
 
-def vuetify(src):
-    try:
-        ps = Popen(["vue-beautify"], stdin=PIPE, stdout=PIPE)
-        stdout, stderr = ps.communicate(src.encode("utf-8"))
-        if ps.wait() == 0:
-            return stdout.decode("utf-8")
-        else:
-            raise FileNotFoundError
-    except FileNotFoundError:
-        return src
+
+def vuetify(src, type="vue"):
+    return beautify(src, type)
 
 
-def run(cmd, silent=False):
-    if silent:
-        cmd = f"{cmd} >/dev/null 2>/dev/null"
-    return os.system(cmd) == 0
+def run(cmd, silent=False, timeout=None):
+    return execute(cmd, silent, timeout) == 0
 
 
-def fail(cmd, silent=False, msg=None):
-    if not run(cmd, silent):
+def fail(cmd, silent=False, msg=None, timeout=None):
+    if not run(cmd, silent, timeout):
         raise OSError("Failed to run {}".format(cmd) if msg is None else msg)
     return True
 
 
 def which(cmd, msg=None):
-    ps = Popen(["which", cmd], stdout=PIPE, stderr=PIPE)
-    stdout, stderr = ps.communicate()
-    if ps.wait() == 0:
-        return stdout.read().decode("utf-8")
-    raise OSError("Failed to run {}".format(cmd) if msg is None else msg)
+    path = shutil.which(cmd)
+    if path:
+        return path
+    raise OSError("Failed to find {}".format(cmd) if msg is None else msg)
+
+
+def yarn_global_prefix():
+    """Points yarn's global installs to ~/.yarn-global, which needs no sudo."""
+    os.makedirs(os.path.expanduser("~/.yarn-global"), exist_ok=True)
+    run("yarn config set prefix ~/.yarn-global")
 
 
 @contextmanager
@@ -52,6 +55,24 @@ def replace_in_file(path, placeholder, new_data):
             f.write(text)
 
 
+@contextmanager
+def atomic_write(path):
+    """
+    File object for streaming into path. path is replaced only when the block
+    finishes without errors, so a failed render doesn't leave half a file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            yield f
+        mode = stat.S_IMODE(os.stat(path).st_mode) if os.path.exists(path) else 0o644
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
 def overwrite(path, force=False):
     if (
         not force
@@ -64,40 +85,74 @@ def overwrite(path, force=False):
 
 
 def set_yarn_path():
-    yarn_path = ":".join(os.popen("yarn global bin && yarn bin").read().splitlines())
+    # what `yarn global bin && yarn bin` prints, without running yarn
+    yarn_path = ":".join(
+        filter(None, [toolchain().global_bin, os.path.abspath("node_modules/.bin")])
+    )
     os.environ["PATH"] = f"{yarn_path}:{os.environ['PATH']}"
 
 
 class Yarn:
-    def __init__(self, use_sudo=False):
+    def __init__(self, use_sudo=False, offline=False, prefer_offline=False):
+        """
+        offline installs only from yarn's cache or offline mirror,
+        prefer_offline only downloads what isn't there.
+        """
         self.use_sudo = use_sudo
-        if not run("which vue", True) and not run("which yarn", True):
-            fail(
-                "which npm", silent=True, msg="Please install yarn or at least npm"
-            )
+        self.offline = offline
+        self.prefer_offline = prefer_offline
+        tools = toolchain()
+        if not tools.binary("vue") and not tools.binary("yarn"):
+            if not tools.binary("npm"):
+                raise OSError("Please install yarn or at least npm")
             print(
                 "Yarn not installed! Please install it first with your package-manager.\
                 Trying to install it via sudo npm i -g yarn"
             )
             fail("sudo npm i -g yarn")
-        yarn_path = ":".join(
-            os.popen("yarn global bin && yarn bin").read().splitlines()
-        )
-        os.environ["PATH"] = f"{yarn_path}:{os.environ['PATH']}"
+        set_yarn_path()
+
+    @property
+    def flags(self):
+        if self.offline:
+            return " --offline"
+        return " --prefer-offline" if self.prefer_offline else ""
 
     def add(self, *packages, globally=False, fail_on_error=False):
+        """Installs all packages in one yarn run."""
+        if not packages:
+            return
         fail_on_error = fail if fail_on_error else run
-        packages = " ".join(f'"{package}"' for package in packages)
+        names = " ".join(map(shlex.quote, packages))
         if not globally:
-            fail_on_error(f"yarn add {packages}")
+            fail_on_error(f"yarn add{self.flags} {names}")
         else:
-            if not run("yarn global list|grep vue-beautify", True):
+            if not all(map(toolchain().has_global, packages)):
                 if not self.use_sudo:
-                    run("mkdir -p ~/.yarn-global")
-                    run("yarn config set prefix ~/.yarn-global")
+                    yarn_global_prefix()
                 fail_on_error(
-                    f"{'sudo ' if self.use_sudo else ''}yarn global add {packages}"
+                    f"{'sudo ' if self.use_sudo else ''}yarn global add{self.flags} {names}"
                 )
 
+    @staticmethod
+    def offline_mirror(path, yarnrc=".yarnrc"):
+        """
+        Makes yarn keep the tarballs of installed packages in path, so later
+        installs can run with offline=True.
+        """
+        os.makedirs(path, exist_ok=True)
+        lines = []
+        if os.path.exists(yarnrc):
+            with open(yarnrc) as f:
+                lines = [
+                    line
+                    for line in f.read().splitlines()
+                    if not line.startswith("yarn-offline-mirror")
+                ]
+        lines.append(f"yarn-offline-mirror {json.dumps(os.path.abspath(path))}")
+        lines.append("yarn-offline-mirror-pruning false")
+        with open(yarnrc, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
     def build(self):
         fail("yarn build")
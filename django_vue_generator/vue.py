@@ -1,6 +1,10 @@
+import io
 import json
 import types
+from collections import ChainMap
+from collections.abc import Mapping
 
+from django_vue_generator.profiling import phase
 from django_vue_generator.utils import vuetify
 
 
@@ -134,20 +138,38 @@ class js_lambda(js_callable):
         return f"({args}) => {body}"
 
 
+json_encoder = json.JSONEncoder()
+
+
+def emit_js(d, write):
+    """
+    Writes js for python value d chunk by chunk with write(str), so big values
+    are never built as one string.
+    """
+    if isinstance(d, (dict, types.GeneratorType)):
+        write("{")
+        for i, (k, v) in enumerate(iter_items(d)):
+            if i:
+                write(",")
+            write(f"{k}{'' if isinstance(v, js_func) else ': '}")
+            if isinstance(v, js_str):
+                write(v)
+            else:
+                emit_js(v, write)
+        write("}")
+    elif isinstance(d, js_func):
+        write(d)
+    else:
+        for chunk in json_encoder.iterencode(d):
+            write(chunk)
+
+
 class py_to_js(js_str):
     @staticmethod
     def call(d):
-        if isinstance(d, (dict, types.GeneratorType)):
-            return "{{{}}}".format(
-                ",".join(
-                    f"{k}{'' if isinstance(v, js_func) else ': '}{v if isinstance(v, js_str) else py_to_js(v)}"
-                    for k, v in iter_items(d)
-                )
-            )
-        elif isinstance(d, js_func):
-            return d
-        else:
-            return json.dumps(d)
+        buffer = io.StringIO()
+        emit_js(d, buffer.write)
+        return buffer.getvalue()
 
 
 def iter_items(d):
@@ -159,6 +181,63 @@ def iter_items(d):
         return d.items()
 
 
+class LazyContext(Mapping):
+    """
+    Attributes of obj as template context. Each one is evaluated the first
+    time the template reads it, so properties it doesn't use never run.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.names = frozenset(dir(obj))
+        self.values = {}
+
+    def __getitem__(self, key):
+        if key not in self.values:
+            if key not in self.names:
+                raise KeyError(key)
+            self.values[key] = getattr(self.obj, key)
+        return self.values[key]
+
+    def __contains__(self, key):
+        return key in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def render_template(template, context):
+    """Renders a jinja2 or django template object without copying context."""
+    if hasattr(template, "root_render_func"):
+        # jinja2's Template.render() would copy context into a dict. The empty
+        # dict is what jinja2 copies for the traceback of a failed render.
+        jinja_context = template.new_context(
+            ChainMap({}, context, template.globals), shared=True
+        )
+        try:
+            return template.environment.concat(template.root_render_func(jinja_context))
+        except Exception:
+            return template.environment.handle_exception()
+    if type(template).__module__.startswith("django"):
+        from django.template import Context
+
+        # backend templates wrap a django.template.Template
+        template = getattr(template, "template", template)
+        return template.render(Context(context))
+    return template.render(context)
+
+
+# compiled templates by (generator class, engine, source)
+_templates = {}
+
+
+def clear():
+    _templates.clear()
+
+
 class Vue:
     """
     data, methods, computed, watch and other properties of the class can be:
@@ -172,8 +251,9 @@ class Vue:
     js_func(args, func_body) - creates function like "foo(arg1) { func_body }"
     js_lambda(args, func_body) - creates function like "foo: => (arg1) { func_body }"
         (if there is no "return" in func_body it would use "foo: => (arg1) func_body")
-    if methods, computed or watch value is not js_func or js_lambda it's automatically converted to js_func
+    if methods, computed or watch value is not js_str, js_func or js_lambda it's automatically converted to js_func
         (with no argumens or (newVal, oldVal) arguments in case of watch).
+        js_str is used as is, e.g. watch = {'p': js_str('{handler(newVal) {...}, deep: true}')}
     data, mounted and created automatically converted to js_func too.
 
 
@@ -214,9 +294,9 @@ class Vue:
     template and style methods should return str.
     or template objeect like:
         def template(self):
-            import jinja2
-            return jinja2.Template('<div><h1>{{name}}</h1><span v-for="i in a" :key="i">{% raw %}{{i}}{% endraw %}</span></div>')
-    then render method would be called with self as context
+            return self.compile('<div><h1>{{name}}</h1><span v-for="i in a" :key="i">{% raw %}{{i}}{% endraw %}</span></div>')
+    compile() builds a jinja2 (or with engine="django" a django) template once per class.
+    then it's rendered with self as context, attributes are only evaluated when the template uses them
     outputs
         <div>
             <h1>vue</h1>
@@ -249,15 +329,46 @@ class Vue:
     mounted = None
     created = None
     imports = ""
+    # npm packages the generated component needs
+    packages = []
 
     def style(self):
         pass
 
+    @classmethod
+    def compile(cls, source, engine="jinja2"):
+        """Template object for source, compiled once per class."""
+        key = (cls, engine, source)
+        if key not in _templates:
+            if engine == "jinja2":
+                import jinja2
+
+                _templates[key] = jinja2.Template(source)
+            elif engine == "django":
+                from django.template import Template
+
+                _templates[key] = Template(source)
+            else:
+                raise ValueError(f"Unknown template engine {engine}")
+        return _templates[key]
+
+    def inputs(self):
+        """
+        Everything the rendered component depends on, as json-serializable dict.
+        Components are only regenerated when it changes. None means always.
+        """
+        return None
+
     def template(self):
         return f"<div>\n<h1>{self.name}</h1>\n</div>"
 
     def script(self):
-        items = [f"name: {repr(self.name)}"]
+        buffer = io.StringIO()
+        self.write_script(buffer.write)
+        return buffer.getvalue()
+
+    def write_script(self, write):
+        write(f"{self.imports}\n\nexport default {{name: {repr(self.name)}")
         for k in [
             "data",
             "methods",
@@ -270,40 +381,69 @@ class Vue:
         ]:
             v = getattr(self, k, None)
             if v:
+                write(",")
                 if k == "data":
-                    v = js_func("", f"return {py_to_js(v)}")
+                    write("data() {return ")
+                    emit_js(v, write)
+                    write("}")
+                    continue
                 if k in ("watch", "methods", "computed"):
                     default_args = ("newVal", "oldVal") if k == "watch" else ()
                     v = {
-                        k: v if isinstance(v, js_callable) else js_func(default_args, v)
+                        k: v if isinstance(v, js_str) else js_func(default_args, v)
                         for k, v in iter_items(getattr(self, k))
                     }
                 if k in ("mounted", "created") and not isinstance(v, js_callable):
                     v = js_func((), v)
-                items.append(
-                    f"""{k}{'' if isinstance(v, js_callable) else ': '}{py_to_js(v)}"""
-                )
+                write(f"{k}{'' if isinstance(v, js_callable) else ': '}")
+                emit_js(v, write)
+        write("};")
 
-        return "{}\n\nexport default {{{}}};".format(self.imports, ",".join(items))
-
-    def render(self):
-        result = ""
+    def blocks(self):
+        """Yields (tag, attributes, content) of template, script and style."""
+        context = None
         for tag in ["template", "script", "style"]:
-            v = getattr(self, tag, None)
-            if callable(v):
-                v = v()
-            if isinstance(v, types.GeneratorType):
-                v = "\n".join(v)
-            if hasattr(v, "render"):
-                context = {k: getattr(self, k) for k in dir(self)}
-                if v.__class__.__module__.startswith("django"):
-                    from django.template import Context
-
-                    context = Context(context)
-                v = v.render(context)
+            with phase("build"):
+                v = getattr(self, tag, None)
+                if callable(v):
+                    v = v()
+                if isinstance(v, types.GeneratorType):
+                    v = "\n".join(v)
+                if hasattr(v, "render"):
+                    if context is None:
+                        context = LazyContext(self)
+                    v = render_template(v, context)
             if v:
-                result += (
-                    f"""<{tag} {getattr(self, tag).__doc__ or ""}>\n{v}\n</{tag}>\n"""
-                )
+                yield tag, getattr(self, tag).__doc__ or "", v
+
+    def render_to(self, fp):
+        """
+        Writes the component to file-like fp one block at a time, so only the
+        block being beautified is held in memory.
+        """
+        for i, (tag, attrs, content) in enumerate(self.blocks()):
+            if i:
+                fp.write("\n")
+            fp.write(vuetify(f"""<{tag} {attrs}>\n{content}\n</{tag}>\n"""))
 
-        return vuetify(result)
+    def render(self):
+        buffer = io.StringIO()
+        self.render_to(buffer)
+        return buffer.getvalue()
+
+
+class JsModule:
+    """Generator of a plain js module, subclasses yield its source in source()."""
+
+    filename = None
+
+    def source(self):
+        raise NotImplementedError
+
+    def render_to(self, fp):
+        fp.write(vuetify("".join(self.source()), "js"))
+
+    def render(self):
+        buffer = io.StringIO()
+        self.render_to(buffer)
+        return buffer.getvalue()